@@ -1,8 +1,7 @@
 import json
-from app.openai_utils.assistant_client import client
-from app.settings.config import CHATGPT_MODEL
 from app.settings.logger import logger
-from app.openai_utils.assistant_client import get_openai_response
+from app.openai_utils.assistant_client import get_openai_response, get_chat_completion
+from app.openai_utils.usage import TokenBudgetExceeded
 
 async def get_cost(neighborhood_address, city, country):
     cost_prompt = (
@@ -12,7 +11,7 @@ async def get_cost(neighborhood_address, city, country):
         "Return the JSON formatted with {} and don't wrap with ```json."
     )
 
-    response = await get_openai_response(cost_prompt)
+    response = await get_openai_response(cost_prompt, site="cost")
     if type(response) != "json":
         try:
             response = json.loads(response.replace("'", "\""))
@@ -35,7 +34,7 @@ async def get_average_cost(full_address):
         "Return the JSON formatted with {} and don't wrap with ```json."
     )
 
-    response = await get_openai_response(average_cost_prompt)
+    response = await get_openai_response(average_cost_prompt, site="average_cost")
     if type(response) != "json":
         try:
             response = json.loads(response.replace("'", "\""))
@@ -60,7 +59,7 @@ async def get_neighbourhood_address(full_address):
         "If neighborhood not found then {'address': '', 'error': error}."
     )
 
-    response = await get_openai_response(neighborhood_prompt)
+    response = await get_openai_response(neighborhood_prompt, site="neighbourhood")
     logger.info(f"[get_neighbourhood_address] Raw response: {response}")
     if type(response) != "json":
         try:
@@ -72,46 +71,48 @@ async def get_neighbourhood_address(full_address):
     return response.get("address", "")
 
 async def analyse_address_using_openai(address):
-    response = await client.chat.completions.create(
-        model=CHATGPT_MODEL,
-        temperature=0,
-        messages=[
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "text",
-                        "text": (
-                            f"Address: {address}\n\n"
-                        "Analyze the given address and respond strictly with a JSON object matching this exact structure:\n"
-                        "{\n"
-                        '  "area_type": STRING,                  // Either "commercial" or "residential"\n'
-                        '  "street_people_type": STRING,         // Only "Wealthy", "Upper Class", "Mid Class", or "Low Class"\n'
-                        '  "property_type": STRING,              // Specifically classify the property type shown (e.g., luxurious home, row house, apartment building, commercial office, shop, etc.).\n'
-                        '  "people_type": STRING,                // Only "Wealthy", "Upper Class", "Mid Class", or "Low Class"\n'
-                        '  "neighbourhood_people_type": STRING   // Only "Wealthy", "Upper Class", "Mid Class", or "Low Class"\n'
-                        "}\n\n"
-                        "Rules for JSON response:\n"
-                        "1. Do NOT wrap your response in markdown or triple backticks.\n"
-                        "2. Each field must have exactly the specified values only.\n"
-                        "3. If unable to determine any field, Default to \"residential\" for area_type and Default to \"home\" for property_type.\n"
-                        "4. **Do not** wrap the final output in markdown syntax like triple backticks or `json`.\n"
-                        "5. The following fields can **only** have one of these four exact string values:\n"
-                        '   - "Wealthy"\n'
-                        '   - "Upper Class"\n'
-                        '   - "Mid Class"\n'
-                        '   - "Low Class"\n'
-                        "6. Applicable fields:\n"
-                        '   - street_people_type\n'
-                        '   - people_type\n'
-                        '   - neighbourhood_people_type\n'
-                        ),
-                    }
-                ],
-            }
-        ],
-    )
-    response = response.choices[0].message.content
+    """Address classification as a dict; the raw text if it can't be parsed, None if the call was skipped."""
+    try:
+        response = await get_chat_completion(
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "text",
+                            "text": (
+                                f"Address: {address}\n\n"
+                            "Analyze the given address and respond strictly with a JSON object matching this exact structure:\n"
+                            "{\n"
+                            '  "area_type": STRING,                  // Either "commercial" or "residential"\n'
+                            '  "street_people_type": STRING,         // Only "Wealthy", "Upper Class", "Mid Class", or "Low Class"\n'
+                            '  "property_type": STRING,              // Specifically classify the property type shown (e.g., luxurious home, row house, apartment building, commercial office, shop, etc.).\n'
+                            '  "people_type": STRING,                // Only "Wealthy", "Upper Class", "Mid Class", or "Low Class"\n'
+                            '  "neighbourhood_people_type": STRING   // Only "Wealthy", "Upper Class", "Mid Class", or "Low Class"\n'
+                            "}\n\n"
+                            "Rules for JSON response:\n"
+                            "1. Do NOT wrap your response in markdown or triple backticks.\n"
+                            "2. Each field must have exactly the specified values only.\n"
+                            "3. If unable to determine any field, Default to \"residential\" for area_type and Default to \"home\" for property_type.\n"
+                            "4. **Do not** wrap the final output in markdown syntax like triple backticks or `json`.\n"
+                            "5. The following fields can **only** have one of these four exact string values:\n"
+                            '   - "Wealthy"\n'
+                            '   - "Upper Class"\n'
+                            '   - "Mid Class"\n'
+                            '   - "Low Class"\n'
+                            "6. Applicable fields:\n"
+                            '   - street_people_type\n'
+                            '   - people_type\n'
+                            '   - neighbourhood_people_type\n'
+                            ),
+                        }
+                    ],
+                }
+            ],
+            site="address_analysis",
+        )
+    except TokenBudgetExceeded:
+        return None
 
     if type(response) != "json":
         try:
@@ -0,0 +1,59 @@
+import asyncio
+import time
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from app.core.disk_cache import DiskCache
+from app.settings.config import REPLAY_MODE, CASSETTE_DIR, REPLAY_LATENCY_SCALE, REPLAY_LATENCY_MS
+from app.settings.logger import logger
+
+# Query parameters holding credentials; never part of a cassette key
+_SECRET_PARAMS = {"key", "api_key"}
+
+_cassettes = {}
+
+
+class CassetteMiss(Exception):
+    """Raised in replay mode when no exchange was recorded for a request."""
+
+
+def _cassette(service):
+    if service not in _cassettes:
+        _cassettes[service] = DiskCache(f"cassette_{service}", directory=CASSETTE_DIR)
+    return _cassettes[service]
+
+
+def request_key(url, params=None):
+    """Cassette key for a GET: the URL and all query parameters, sorted, without API keys."""
+    parts = urlsplit(str(url))
+    query = parse_qsl(parts.query, keep_blank_values=True) + [(k, str(v)) for k, v in (params or {}).items()]
+    query = sorted((k, v) for k, v in query if k not in _SECRET_PARAMS)
+    return DiskCache.make_key("GET", parts._replace(query="", fragment="").geturl(), urlencode(query))
+
+
+async def exchange(service, key, call, dump=None, load=None):
+    """Run an outbound call live, recorded to the service's cassette, or replayed from it.
+
+    call is a coroutine function doing the real request. dump/load convert its result
+    to and from JSON when it is not JSON-serialisable as is.
+    """
+    if REPLAY_MODE == "replay":
+        entry = _cassette(service).get_json(key)
+        if entry is None:
+            logger.warning(f"⚠️ [cassette] No recorded {service} exchange for key {key[:12]}.")
+            raise CassetteMiss(f"no recorded {service} exchange for key {key[:12]}")
+        delay = entry["elapsed"] * REPLAY_LATENCY_SCALE + REPLAY_LATENCY_MS / 1000
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return load(entry["response"]) if load else entry["response"]
+
+    if REPLAY_MODE != "record":
+        return await call()
+
+    started = time.perf_counter()
+    response = await call()
+    elapsed = time.perf_counter() - started
+    _cassette(service).set_json(key, {"response": dump(response) if dump else response, "elapsed": round(elapsed, 4)})
+    return response
+
+
+def cassette_stats():
+    return {service: cassette.stats() for service, cassette in _cassettes.items()}
@@ -0,0 +1,14 @@
+import asyncio
+from app.settings.config import SERP_CONCURRENCY, OPENAI_CONCURRENCY, GOOGLE_MAPS_CONCURRENCY, DB_CONCURRENCY
+
+# Shared limits so that N account workers never exceed the per-service caps
+serp_limit = asyncio.Semaphore(SERP_CONCURRENCY)
+openai_limit = asyncio.Semaphore(OPENAI_CONCURRENCY)
+maps_limit = asyncio.Semaphore(GOOGLE_MAPS_CONCURRENCY)
+db_limit = asyncio.Semaphore(DB_CONCURRENCY)
+
+
+async def run_db(func, *args):
+    """Run a blocking Database method in a worker thread (one pooled connection each) under the DB cap."""
+    async with db_limit:
+        return await asyncio.to_thread(func, *args)
@@ -0,0 +1,4 @@
+import contextvars
+
+# Account being processed by the current task; set by the account worker, inherited by its child tasks
+current_account = contextvars.ContextVar("current_account", default=None)
@@ -1,44 +1,46 @@
-from app.openai_utils.assistant_client import client
-from app.settings.config import CHATGPT_MODEL
+import json
+from app.openai_utils.assistant_client import get_chat_completion
+from app.openai_utils.usage import TokenBudgetExceeded
 from app.openai_utils.response_parser import parse_response
+from app.core.price_stats import extract_listings, per_square_meter_values, summarise_prices
 from app.settings.logger import logger
 
+# Listings shown to the model as examples for the people-type classification
+MAX_SAMPLE_LISTINGS = 15
+
 async def get_average_price_people_type(scaped_responses):
     logger.info("📊 [get_average_price_people_type] Function started.")
 
-    average_prompt = scaped_responses + """\n\nThe input text contains multiple OpenAI responses generated from scraped data across various property listing websites.
+    listings = extract_listings(scaped_responses)
+    price_stats = summarise_prices(per_square_meter_values(listings))
+    logger.info(f"📊 [get_average_price_people_type] {len(listings)} listings, {price_stats['count']} with a valid price per m².")
 
-1. From the input text, **only extract the responses that are in valid JSON format** matching this structure:
-{
-  "title": "listed property title",
-  "description": "description of the listed property",
-  "price": "price of property",
-  "price_in_USD": "price of property in USD",
-  "square_meter": "size / area of property",
-  "details_url": "details page link of property"
-}
+    samples = [
+        {
+            "title": item.get("title", ""),
+            "square_meter": item.get("square_meter", ""),
+            "per_square_meter_in_USD": item.get("per_square_meter_in_USD", ""),
+        }
+        for item in listings[:MAX_SAMPLE_LISTINGS]
+    ]
 
-2. Ignore all non-JSON or malformed responses.
+    people_type_prompt = f"""Price per square meter in USD, computed from {price_stats['count']} property listings scraped in this area:
+{json.dumps(price_stats)}
 
-3. Based on the valid extracted JSON responses, calculate the **average** and **median price per square meter in USD**. Round the results to the nearest whole number.
+Sample listings:
+{json.dumps(samples, ensure_ascii=False)}
 
-4. Then, generate and return a single, final JSON object in the following structure:
-{
-  "average": INTEGER, // average price per square meter in USD
-  "median": INTEGER,  // median price per square meter in USD
+1. Based on the price statistics and sample listings above, classify the area and return a single JSON object in the following structure:
+{{
   "street_people_type": STRING,        // e.g., "Wealthy", "Upper Class", etc.
   "property_type": STRING,             // e.g., Specifically classify the property type shown (e.g., luxurious home, row house, apartment building, commercial office, shop, etc.).
   "people_type": STRING,               // e.g., "Wealthy", "Upper Class", etc.
   "neighbourhood_people_type": STRING  // e.g., "Wealthy", "Upper Class", etc.
-}
-
-5. **Do not** include currency symbols like `$` or `USD` in numeric values.
+}}
 
-6. **Do not** wrap the final output in markdown syntax like triple backticks or `json`.
+2. **Do not** wrap the final output in markdown syntax like triple backticks or `json`.
 
-7. If average or median cannot be calculated (e.g., missing or invalid data), simply place a **0** rather than using placeholder values like "unknown" or "N/A".
-
-8. The following fields can **only** have one of these four exact string values:
+3. The following fields can **only** have one of these four exact string values:
 - "Wealthy"
 - "Upper Class"
 - "Mid Class"
@@ -51,21 +53,37 @@ Applicable fields:
 """
 
     try:
-        response = await client.chat.completions.create(
-            model=CHATGPT_MODEL,
-            temperature=0,
+        response = await get_chat_completion(
             messages=[
                 {
                     "role": "user",
-                    "content": [{"type": "text", "text": average_prompt}],
+                    "content": [{"type": "text", "text": people_type_prompt}],
                 }
             ],
+            site="price_stats",
         )
 
-        response_text = parse_response(response.choices[0].message.content)
+        response_text = parse_response(response)
+        if not isinstance(response_text, dict):
+            response_text = {}
         logger.info(f"[get_average_price_people_type] Parsed OpenAI response: {response_text}")
-        return response_text
 
+    except TokenBudgetExceeded:
+        # The price statistics are local, so only the people-type classification is skipped
+        logger.info("[get_average_price_people_type] People-type classification skipped, token budget used up.")
+        if not price_stats["count"]:
+            return {}
+        response_text = {}
     except Exception as e:
         logger.exception(f"❌ [get_average_price_people_type] Error communicating with OpenAI: {e}")
-        return {}
+        if not price_stats["count"]:
+            return {}
+        response_text = {}
+
+    # Numbers always come from the local statistics, never from the model
+    response_text.update({
+        "average": price_stats["average"],
+        "median": price_stats["median"],
+        "price_stats": price_stats,
+    })
+    return response_text
@@ -0,0 +1,44 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from app.settings.config import CPU_WORKERS
+from app.settings.logger import logger
+
+_pool = None
+
+
+def get_cpu_pool():
+    """Return the shared process pool, created on first use."""
+    global _pool
+    if _pool is None:
+        # spawn: children must not inherit the event loop, sockets or SQLite handles of the parent
+        _pool = ProcessPoolExecutor(max_workers=CPU_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        logger.info(f"⚙️ [cpu_pool] Started process pool with {CPU_WORKERS} workers.")
+    return _pool
+
+
+async def run_cpu(func, *args):
+    """Run a CPU-bound function in the process pool.
+
+    func must be importable at module level and args/results picklable, so pass plain
+    strings, bytes, lists and dicts rather than parse trees or images.
+    """
+    if CPU_WORKERS <= 0:
+        return func(*args)
+
+    global _pool
+    try:
+        return await asyncio.get_running_loop().run_in_executor(get_cpu_pool(), func, *args)
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM); replace the pool so later calls can still run
+        logger.error(f"❌ [run_cpu] Process pool broken while running {func.__qualname__}, restarting it.")
+        _pool = None
+        raise
+
+
+def shutdown_cpu_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
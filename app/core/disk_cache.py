@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from app.settings.config import CACHE_DIR
+from app.settings.logger import logger
+
+
+class DiskCache:
+    """SQLite-backed key/value cache with TTL expiry and least-recently-used eviction by size."""
+
+    def __init__(self, name, ttl_seconds=0, max_bytes=0, directory=CACHE_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            os.path.join(directory, f"{name}.sqlite3"), check_same_thread=False, isolation_level=None
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at)")
+        self._total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    @staticmethod
+    def make_key(*parts):
+        return hashlib.sha256("\x1f".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+    def get(self, key, ttl_seconds=None):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute("SELECT value, size, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, size, created_at = row
+            if ttl and now - created_at > ttl:
+                self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._total_bytes -= size
+                self.misses += 1
+                return None
+
+            self.conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            previous = self.conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now),
+            )
+            self._total_bytes += len(value) - (previous[0] if previous else 0)
+            if self.max_bytes and self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def get_json(self, key, ttl_seconds=None):
+        value = self.get(key, ttl_seconds)
+        return None if value is None else json.loads(value)
+
+    def set_json(self, key, value):
+        self.set(key, json.dumps(value).encode("utf-8"))
+
+    def _evict(self):
+        # Drop least recently used entries until the cache is back under 90% of its cap
+        target = self.max_bytes * 0.9
+        evicted = 0
+        while self._total_bytes > target:
+            rows = self.conn.execute("SELECT key, size FROM entries ORDER BY accessed_at LIMIT 100").fetchall()
+            if not rows:
+                self._total_bytes = 0
+                break
+            for key, size in rows:
+                self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._total_bytes -= size
+                evicted += 1
+                if self._total_bytes <= target:
+                    break
+        logger.debug(f"🧹 [DiskCache:{self.name}] Evicted {evicted} entries.")
+
+    def stats(self):
+        with self._lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": self._total_bytes}
@@ -0,0 +1,158 @@
+import asyncio
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, asdict
+import numpy as np
+from app.core.serp import search
+from app.settings.config import (
+    SERP_API_KEY, FX_CACHE_TTL_SECONDS, FX_RATE_TABLE, FX_RATE_MAX_AGE_HOURS, FX_FETCH_ATTEMPTS, FX_RETRY_SECONDS
+)
+from app.settings.logger import logger
+
+COUNTRY_CURRENCIES = {
+    'South Africa': 'ZAR',
+}
+
+_RATE_PATTERN = re.compile(r"(\d+(?:[.,]\d+)?)\s*(?:USD|US Dollars?)", re.IGNORECASE)
+
+# pair -> (FxRate, time.monotonic() after which it is resolved again)
+_rates = {}
+_rate_lock = asyncio.Lock()
+
+
+@dataclass(frozen=True)
+class FxRate:
+    base: str
+    quote: str
+    rate: float
+    as_of: float
+    source: str
+
+    @property
+    def pair(self):
+        return f"{self.base}/{self.quote}"
+
+    def convert(self, amounts):
+        """Convert a scalar or an array of amounts from base to quote currency."""
+        return np.asarray(amounts, dtype=float) * self.rate
+
+    def __str__(self):
+        return f"1 {self.base} = {self.rate} {self.quote}"
+
+
+def currency_for(country):
+    return COUNTRY_CURRENCIES.get(country, country)
+
+
+def parse_wise_snippet(snippet):
+    """Extract the USD rate from a Wise snippet_highlighted_words list, or 0.0 if absent."""
+    try:
+        return float(snippet[0].split(',')[1].strip().split(' ')[0])
+    except (IndexError, ValueError, AttributeError):
+        pass
+
+    for text in snippet:
+        match = _RATE_PATTERN.search(str(text))
+        if match:
+            return float(match.group(1).replace(',', '.'))
+    return 0.0
+
+
+def _load_rate_table():
+    try:
+        with open(FX_RATE_TABLE, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.warning(f"⚠️ [fx] Failed to read rate table {FX_RATE_TABLE}: {e}")
+        return {}
+
+
+def _save_rate(fx_rate):
+    table = _load_rate_table()
+    table[fx_rate.pair] = asdict(fx_rate)
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(FX_RATE_TABLE)), exist_ok=True)
+        with open(FX_RATE_TABLE, "w", encoding="utf-8") as file:
+            json.dump(table, file, indent=2)
+    except Exception as e:
+        logger.warning(f"⚠️ [fx] Failed to write rate table {FX_RATE_TABLE}: {e}")
+
+
+def _rate_from_table(base, quote):
+    entry = _load_rate_table().get(f"{base}/{quote}")
+    return FxRate(**entry) if entry else None
+
+
+def _is_fresh(fx_rate):
+    age_hours = (time.time() - fx_rate.as_of) / 3600
+    if FX_RATE_MAX_AGE_HOURS and age_hours > FX_RATE_MAX_AGE_HOURS:
+        logger.info(f"⌛ [fx] Rate table entry for {fx_rate.pair} is {age_hours:.1f}h old, refreshing.")
+        return False
+    return True
+
+
+def _wise_rate(results):
+    organic_results = results.get("organic_results", [])
+    wise_snippets = [result['snippet_highlighted_words'] for result in organic_results if result.get('source') == 'Wise']
+    return parse_wise_snippet(wise_snippets[0]) if wise_snippets else 0.0
+
+
+async def _fetch_rate(country, base, quote):
+    """Look the rate up via SERP with exponential backoff; None if every attempt failed."""
+    params = {
+        "engine": "google",
+        "q": f"1 {country} currency in {quote}",
+        "api_key": SERP_API_KEY,
+    }
+
+    for attempt in range(FX_FETCH_ATTEMPTS):
+        if attempt:
+            await asyncio.sleep(2 ** (attempt - 1))
+        logger.info(f"📊 [fx] Fetching conversion rate for {country} (attempt {attempt + 1}/{FX_FETCH_ATTEMPTS})...")
+        # Responses without a Wise rate are not cached, so a retry queries SERP again
+        rate = _wise_rate(await search(params, ttl_seconds=FX_CACHE_TTL_SECONDS, accept=_wise_rate))
+        if rate:
+            fx_rate = FxRate(base, quote, rate, time.time(), "serp:wise")
+            _save_rate(fx_rate)
+            return fx_rate
+
+    logger.warning(f"⚠️ [fx] No conversion rate found for {country}.")
+    return None
+
+
+async def _resolve_rate(country, base, quote):
+    """(FxRate, seconds it is valid for): a fresh table entry or a new lookup for the whole run, else the
+    stale table entry or no rate until the lookup is retried after FX_RETRY_SECONDS."""
+    table_rate = _rate_from_table(base, quote)
+    if table_rate is not None and _is_fresh(table_rate):
+        return table_rate, float("inf")
+
+    fetched = await _fetch_rate(country, base, quote)
+    if fetched is not None:
+        return fetched, float("inf")
+
+    if table_rate is not None:
+        logger.warning(f"⚠️ [fx] Falling back to the stale rate table entry for {table_rate.pair}.")
+        return table_rate, FX_RETRY_SECONDS
+    return FxRate(base, quote, 0.0, time.time(), "unavailable"), FX_RETRY_SECONDS
+
+
+async def get_usd_rate(country):
+    """Return the FxRate from the country's currency to USD, resolved once per run once a lookup succeeded."""
+    base, quote = currency_for(country), "USD"
+    pair = f"{base}/{quote}"
+    cached = _rates.get(pair)
+    if cached is not None and time.monotonic() < cached[1]:
+        return cached[0]
+
+    async with _rate_lock:
+        cached = _rates.get(pair)
+        if cached is None or time.monotonic() >= cached[1]:
+            fx_rate, valid_seconds = await _resolve_rate(country, base, quote)
+            logger.info(f"✅ [fx] Using rate {fx_rate} ({fx_rate.source})")
+            cached = _rates[pair] = (fx_rate, time.monotonic() + valid_seconds)
+    return cached[0]
@@ -1,9 +1,19 @@
 import re
-import requests
-from app.openai_utils.assistant_client import client
-from app.settings.config import CHATGPT_MODEL
+import httpx
+from app.core.http_client import fetch, is_truncated
+from app.core.cpu_pool import run_cpu
+from app.core.html_reduction import reduce_html
+from app.openai_utils.assistant_client import get_chat_completion
+from app.openai_utils.usage import TokenBudgetExceeded
 from app.settings.logger import logger
 
+_BODY = re.compile(r'<body.*?>(.*?)</body>', re.DOTALL | re.IGNORECASE)
+
+def extract_body(html_content):
+    """Return the inner <body> HTML, or None if there is no body tag. Runs in the CPU pool."""
+    body_content = _BODY.search(html_content)
+    return body_content.group(1) if body_content else None
+
 async def fetch_html(url):
     logger.info("🤖 [fetch_html] Function started...")
 
@@ -12,48 +22,46 @@ async def fetch_html(url):
         return None
 
     try:
-        response = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
+        response = await fetch(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
         response.raise_for_status()
+        if is_truncated(response):
+            # A partial page would be extracted, archived and learned from as if it were complete
+            logger.warning(f"⚠️ [fetch_html] Page {url} is larger than HTTP_MAX_BYTES, skipping it.")
+            return None
         html_content = response.text
 
-        body_content = re.search(r'<body.*?>(.*?)</body>', html_content, re.DOTALL | re.IGNORECASE)
-        if body_content:
+        body_content = await run_cpu(extract_body, html_content)
+        if body_content is not None:
             logger.info("✅ [fetch_html] Body content extracted successfully.")
-            return body_content.group(1)
+            return body_content
         else:
             logger.warning("⚠️ [fetch_html] <body> tag not found, returning full HTML content.")
             return html_content
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"❌ [fetch_html] Error fetching HTML from {url}: {e}")
         return None
 
-async def fetch_openAI_results(filename, covert_price_to_dollar):
+async def fetch_openAI_results(html_data, covert_price_to_dollar):
     logger.info("🤖 [fetch_openAI_results] Function started.")
     logger.info(f"💰 USD conversion rate used: {covert_price_to_dollar}")
 
-    try:
-        with open(filename, "r", encoding="utf-8") as file:
-            html_data = file.read()
-    except Exception as e:
-        logger.error(f"❌ [fetch_openAI_results] Failed to read file {filename}: {e}")
-        return ""
-
     if html_data:
-        logger.info("📤 [fetch_openAI_results] Sending HTML content to OpenAI API...")
+        listing_text, reduction = await run_cpu(reduce_html, html_data)
+        logger.info(f"📤 [fetch_openAI_results] Sending reduced page content ({reduction['ratio']}x smaller) to OpenAI API...")
 
         prompt = f"""
-Analyze the provided HTML content and extract property listings with the following requirements:
+Analyze the provided page content and extract property listings with the following requirements:
 
 - **Property Types:** Only include properties classified explicitly as Flat, Apartment, House, or Commercial. Exclude all other property types.
 - **Extract the following data points for each property:**
     - **Title:** Clearly identified property title.
     - **Description:** Full description text.
-    - **Price:** Exact price as displayed in HTML content (do NOT convert).
+    - **Price:** Exact price as displayed in the page content (do NOT convert).
     - **Price in USD:** Convert the extracted price to USD using the conversion rate provided: {covert_price_to_dollar}.
     - **Square Meters (Area):** Extract explicitly provided area in square meters. If area is missing, estimate reasonably using property title and description.
     - **Price per Square Meter in USD:** Calculate by dividing "Price in USD" by "Square Meters".
-    - **Details URL:** Full URL link to the property's details page.
+    - **Details URL:** Full URL link to the property's details page (links are shown in [brackets]).
 
 - **Output Format:** Return a JSON-formatted list of property entries without wrapping it in markdown or ```json.
 
@@ -71,24 +79,24 @@ Use the following exact JSON structure for each property:
     "details_url": "STRING"
 }}
 
-HTML Content (trimmed to fit token limit):
-{html_data[:100000]}
+Page content (one line per listing when listings were detected, trimmed to fit token limit):
+{listing_text[:100000]}
 """
 
         try:
-            response = await client.chat.completions.create(
-                model=CHATGPT_MODEL,
-                temperature=0,
+            json_response = await get_chat_completion(
                 messages=[
                     {"role": "system", "content": "You are an expert in property analysis and pricing."},
                     {"role": "user", "content": prompt}
-                ]
+                ],
+                site="listing_extraction",
             )
 
-            json_response = response.choices[0].message.content
             logger.info("✅ [fetch_openAI_results] Received response from OpenAI.")
             return json_response
 
+        except TokenBudgetExceeded:
+            return ""
         except Exception as e:
             logger.exception(f"❌ [fetch_openAI_results] OpenAI API call failed: {e}")
             return ""
@@ -0,0 +1,76 @@
+import re
+from collections import defaultdict
+from bs4 import BeautifulSoup, Comment
+from app.settings.logger import logger
+
+try:
+    import lxml  # noqa: F401
+    _PARSER = "lxml"
+except ImportError:
+    _PARSER = "html.parser"
+
+NON_CONTENT_TAGS = (
+    "script", "style", "noscript", "svg", "iframe", "canvas", "template", "link", "meta",
+    "nav", "header", "footer", "form", "button", "select", "input", "picture", "video", "audio",
+)
+MIN_REPEATED_CARDS = 3
+MIN_CARD_CHARS = 30
+MAX_CARD_CHARS = 3000
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _text(tag):
+    return _WHITESPACE.sub(" ", tag.get_text(" ", strip=True)).strip()
+
+
+def _find_listing_cards(root):
+    """Return the most prominent group of repeated, price-like subtrees (same tag and classes)."""
+    groups = defaultdict(list)
+    for tag in root.find_all(True):
+        classes = tag.get("class")
+        if classes:
+            groups[(tag.name, tuple(sorted(classes)))].append(tag)
+
+    best_cards, best_score = [], 0
+    for cards in groups.values():
+        if len(cards) < MIN_REPEATED_CARDS:
+            continue
+        texts = [_text(card) for card in cards]
+        usable = [text for text in texts if MIN_CARD_CHARS <= len(text) <= MAX_CARD_CHARS and any(c.isdigit() for c in text)]
+        if len(usable) < MIN_REPEATED_CARDS:
+            continue
+        # Outer card containers repeat as often as their inner fields but carry more text
+        score = len(usable) * sorted(len(text) for text in usable)[len(usable) // 2]
+        if score > best_score:
+            best_cards, best_score = cards, score
+    return best_cards
+
+
+def reduce_html(html):
+    """Strip non-content nodes and attributes from a page and return (compact listing text, stats)."""
+    soup = BeautifulSoup(html, _PARSER)
+    for tag in soup(NON_CONTENT_TAGS):
+        tag.decompose()
+    for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
+        comment.extract()
+
+    # Only text reaches the model, so keep link targets as inline text
+    for anchor in soup.find_all("a", href=True):
+        anchor.append(f" [{anchor['href']}]")
+
+    root = soup.body or soup
+    cards = _find_listing_cards(root)
+    if cards:
+        reduced = "\n".join(f"- {text}" for text in map(_text, cards) if text)
+    else:
+        reduced = _text(root)
+
+    stats = {
+        "original_chars": len(html),
+        "reduced_chars": len(reduced),
+        "cards": len(cards),
+        "ratio": round(len(html) / max(len(reduced), 1), 1),
+    }
+    logger.info(f"✂️ [reduce_html] {stats['original_chars']} → {stats['reduced_chars']} chars ({stats['ratio']}x), {stats['cards']} listing cards.")
+    return reduced, stats
@@ -0,0 +1,123 @@
+import asyncio
+import base64
+from urllib.parse import urlparse
+import httpx
+from app.core import cassette
+from app.settings.config import (
+    HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE, HTTP_PER_HOST_LIMIT, HTTP_TIMEOUT, HTTP_MAX_BYTES
+)
+from app.settings.logger import logger
+
+_client = None
+_host_limits = {}
+
+# Headers describing the wire body; dropped once the body has been decoded
+_WIRE_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+# Set on responses whose body was cut at max_bytes; kept in recorded cassettes
+TRUNCATED_HEADER = "x-body-truncated"
+
+
+def _http2_available():
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def get_http_client():
+    """Return the process-wide pooled AsyncClient, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        http2 = _http2_available()
+        _client = httpx.AsyncClient(
+            http2=http2,
+            follow_redirects=True,
+            timeout=HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=30,
+            ),
+        )
+        logger.info(f"🌐 [http_client] Shared HTTP client created (http2={http2}).")
+    return _client
+
+
+def _host_limit(url):
+    host = urlparse(str(url)).netloc.lower()
+    if host not in _host_limits:
+        _host_limits[host] = asyncio.Semaphore(HTTP_PER_HOST_LIMIT)
+    return _host_limits[host]
+
+
+async def fetch(url, params=None, headers=None, timeout=None, max_bytes=HTTP_MAX_BYTES):
+    """GET a URL through the shared client, streaming at most max_bytes of the body."""
+    try:
+        return await cassette.exchange(
+            "http", cassette.request_key(url, params),
+            lambda: _fetch(url, params, headers, timeout, max_bytes),
+            dump=_dump_response, load=_load_response,
+        )
+    except cassette.CassetteMiss as e:
+        # Behave like an unreachable host so callers take their usual error paths
+        raise httpx.ConnectError(str(e)) from e
+
+
+async def _fetch(url, params, headers, timeout, max_bytes):
+    async with _host_limit(url):
+        async with get_http_client().stream(
+            "GET", url, params=params, headers=headers, timeout=timeout or HTTP_TIMEOUT
+        ) as response:
+            chunks = []
+            size = 0
+            truncated = False
+            async for chunk in response.aiter_bytes():
+                chunks.append(chunk)
+                size += len(chunk)
+                if max_bytes and size >= max_bytes:
+                    logger.warning(f"⚠️ [http_client] Body of {url} truncated at {size} bytes.")
+                    truncated = True
+                    break
+
+    response_headers = [(k, v) for k, v in response.headers.items() if k.lower() not in _WIRE_HEADERS]
+    if truncated:
+        response_headers.append((TRUNCATED_HEADER, "1"))
+    return httpx.Response(
+        status_code=response.status_code,
+        headers=response_headers,
+        content=b"".join(chunks),
+        request=response.request,
+    )
+
+
+def is_truncated(response):
+    """True if fetch() cut the response body at max_bytes."""
+    return response is not None and TRUNCATED_HEADER in response.headers
+
+
+def _dump_response(response):
+    return {
+        "status_code": response.status_code,
+        "headers": list(response.headers.items()),
+        "url": str(response.request.url),
+        "content": base64.b64encode(response.content).decode("ascii"),
+    }
+
+
+def _load_response(data):
+    return httpx.Response(
+        status_code=data["status_code"],
+        headers=data["headers"],
+        content=base64.b64decode(data["content"]),
+        request=httpx.Request("GET", data["url"]),
+    )
+
+
+async def close_http_client():
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+        logger.info("🔌 [http_client] Shared HTTP client closed.")
+    _client = None
@@ -1,25 +1,78 @@
 import base64
 import json
+import re
 from PIL import Image
 from io import BytesIO
-import httpx
-from app.openai_utils.assistant_client import client
-from app.settings.config import GOOGLE_MAP_API_KEY, CHATGPT_MODEL
+from app.core.http_client import fetch
+from app.core.disk_cache import DiskCache
+from app.openai_utils.assistant_client import get_chat_completion
+from app.openai_utils.usage import TokenBudgetExceeded
+from app.settings.config import (
+    GOOGLE_MAP_API_KEY, GEOCODE_CACHE_TTL_SECONDS, STREET_VIEW_CELL_DECIMALS, MAPS_CACHE_MAX_MB
+)
+from app.core.concurrency import maps_limit
+from app.core.cpu_pool import run_cpu
 from app.settings.logger import logger
 
-async def analyse_location_image(address):
-    logger.info("🤖 [analyse_location_image] Function started.")
-    is_valid = False
-    geocode_url = "https://maps.googleapis.com/maps/api/geocode/json"
+_geocode_cache = DiskCache("geocode", GEOCODE_CACHE_TTL_SECONDS, MAPS_CACHE_MAX_MB * 1024 * 1024)
+_street_view_cache = DiskCache("street_view", 0, MAPS_CACHE_MAX_MB * 1024 * 1024)
+
+def normalize_address(address):
+    address = re.sub(r"\s*,\s*", ", ", address.strip().lower())
+    return re.sub(r"\s+", " ", address)
+
+def location_cell(lat, lon):
+    return f"{round(lat, STREET_VIEW_CELL_DECIMALS)},{round(lon, STREET_VIEW_CELL_DECIMALS)}"
+
+async def geocode_address(address):
+    key = normalize_address(address)
+    cached = _geocode_cache.get_json(key)
+    if cached is not None:
+        logger.info("📦 [geocode_address] Using cached geocode result.")
+        return cached
+
     params = {
         "address": address,
         "key": GOOGLE_MAP_API_KEY
     }
+    async with maps_limit:
+        geocode_response = await fetch("https://maps.googleapis.com/maps/api/geocode/json", params=params)
+    geocode_response = geocode_response.json()
+
+    # Quota and auth errors are transient, only definitive answers are cached
+    if geocode_response.get("status") in ("OK", "ZERO_RESULTS"):
+        _geocode_cache.set_json(key, geocode_response)
+    return geocode_response
+
+async def fetch_street_view_image(lat, lon):
+    key = location_cell(lat, lon)
+    image_bytes = _street_view_cache.get(key)
+    if image_bytes is not None:
+        logger.info(f"📦 [fetch_street_view_image] Using cached image for cell {key}.")
+        return image_bytes
+
+    street_view_url = f"https://maps.googleapis.com/maps/api/streetview?size=600x400&location={lat},{lon}&key={GOOGLE_MAP_API_KEY}"
+    async with maps_limit:
+        street_view_response = await fetch(street_view_url)
+
+    if street_view_response.status_code != 200:
+        return None
+    _street_view_cache.set(key, street_view_response.content)
+    return street_view_response.content
+
+def encode_png_base64(image_bytes):
+    """Decode a Street View image and re-encode it as base64 PNG. Runs in the CPU pool."""
+    image = Image.open(BytesIO(image_bytes))
+    buffered = BytesIO()
+    image.save(buffered, format="PNG")
+    return base64.b64encode(buffered.getvalue()).decode("utf-8")
+
+async def analyse_location_image(address):
+    logger.info("🤖 [analyse_location_image] Function started.")
+    is_valid = False
 
     try:
-        geocode_request = httpx.AsyncClient()
-        geocode_response = await geocode_request.get(geocode_url, params=params)
-        geocode_response = geocode_response.json()
+        geocode_response = await geocode_address(address)
     except Exception as e:
         logger.error(f"❌ [analyse_location_image] Failed to get geocode response: {e}")
         return {'object': '', 'area_type': '', 'image_people_type': '', 'property_type': ''}, False
@@ -29,23 +82,16 @@ async def analyse_location_image(address):
     if geocode_response["status"] == "OK":
         location = geocode_response["results"][0]["geometry"]["location"]
         lat, lon = location["lat"], location["lng"]
-        street_view_url = f"https://maps.googleapis.com/maps/api/streetview?size=600x400&location={lat},{lon}&key={GOOGLE_MAP_API_KEY}"
 
         try:
-            street_view_request = httpx.AsyncClient()
-            street_view_response = await street_view_request.get(street_view_url)
+            image_bytes = await fetch_street_view_image(lat, lon)
 
-            if street_view_response.status_code == 200:
-                image = Image.open(BytesIO(street_view_response.content))
-                buffered = BytesIO()
-                image.save(buffered, format="PNG")
-                img_str = base64.b64encode(buffered.getvalue()).decode("utf-8")
+            if image_bytes is not None:
+                img_str = await run_cpu(encode_png_base64, image_bytes)
 
                 logger.info("[analyse_location_image] Image fetched successfully, sending to OpenAI...")
 
-                ai_response = await client.chat.completions.create(
-                    model=CHATGPT_MODEL,
-                    temperature=0,
+                response = await get_chat_completion(
                     messages=[
                         {
                             "role": "system",
@@ -94,10 +140,9 @@ Applicable fields:
                             ],
                         }
                     ],
+                    site="image_analysis",
                 )
 
-                response = ai_response.choices[0].message.content
-
                 if type(response) != "json":
                     try:
                         response = json.loads(response.replace("'", "\""))
@@ -109,6 +154,9 @@ Applicable fields:
             else:
                 logger.error("[analyse_location_image] Failed to fetch location image from Google Street View.")
 
+        except TokenBudgetExceeded:
+            # Left invalid so the account's image stage is not checkpointed and runs again on resume
+            logger.info("[analyse_location_image] Image analysis skipped, token budget used up.")
         except Exception as e:
             logger.error(f"[analyse_location_image] Error while processing Street View image: {e}")
     else:
@@ -0,0 +1,185 @@
+import asyncio
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from app.settings.config import METRICS_FILE, METRICS_PORT
+from app.settings.logger import logger
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is +Inf
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+METRIC_PREFIX = "property_analyzer_stage"
+
+
+class StageStats:
+    """Latency histogram, call count and error count of one (stage, domain) pair."""
+
+    __slots__ = ("buckets", "count", "errors", "total", "max")
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds, failed):
+        index = next((i for i, bound in enumerate(BUCKETS) if seconds <= bound), len(BUCKETS))
+        self.buckets[index] += 1
+        self.count += 1
+        self.errors += failed
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """Estimate a latency quantile by interpolating inside its histogram bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            if count and seen + count >= rank:
+                lower = BUCKETS[i - 1] if i > 0 else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+
+class Span:
+    """Handle yielded by span(); call fail() when a stage returns an error instead of raising."""
+
+    __slots__ = ("failed",)
+
+    def __init__(self):
+        self.failed = False
+
+    def fail(self):
+        self.failed = True
+
+
+class StageMetrics:
+    """Per-stage and per-domain timings of one run, shared by all workers."""
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, domain, seconds, failed=False):
+        with self._lock:
+            stats = self._stats.get((stage, domain))
+            if stats is None:
+                stats = self._stats[(stage, domain)] = StageStats()
+            stats.observe(seconds, failed)
+
+    @contextmanager
+    def span(self, stage, domain=""):
+        """Time the enclosed block as one call of stage; an exception escaping it counts as an error."""
+        handle = Span()
+        started = time.perf_counter()
+        try:
+            yield handle
+        except asyncio.CancelledError:
+            # Cancelled calls (links dropped once enough listings were found) are neither timed nor errors
+            raise
+        except Exception:
+            self.observe(stage, domain, time.perf_counter() - started, True)
+            raise
+        self.observe(stage, domain, time.perf_counter() - started, handle.failed)
+
+    def snapshot(self):
+        with self._lock:
+            return sorted(self._stats.items())
+
+    def render_prometheus(self):
+        """All stage metrics in the Prometheus text exposition format."""
+        lines = [
+            f"# HELP {METRIC_PREFIX}_seconds Latency of pipeline stages.",
+            f"# TYPE {METRIC_PREFIX}_seconds histogram",
+        ]
+        errors = [
+            f"# HELP {METRIC_PREFIX}_errors_total Pipeline stage calls that failed.",
+            f"# TYPE {METRIC_PREFIX}_errors_total counter",
+        ]
+        for (stage, domain), stats in self.snapshot():
+            labels = f'stage="{_escape(stage)}",domain="{_escape(domain)}"'
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ("+Inf",), stats.buckets):
+                cumulative += count
+                lines.append(f'{METRIC_PREFIX}_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{METRIC_PREFIX}_seconds_sum{{{labels}}} {stats.total:.6f}")
+            lines.append(f"{METRIC_PREFIX}_seconds_count{{{labels}}} {stats.count}")
+            errors.append(f"{METRIC_PREFIX}_errors_total{{{labels}}} {stats.errors}")
+        return "\n".join(lines + errors) + "\n"
+
+    def write_file(self, path=METRICS_FILE):
+        """Write the Prometheus text atomically, e.g. for node_exporter's textfile collector."""
+        if not path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+        logger.info(f"📈 [metrics] Stage metrics written to {path}")
+
+    def summary_table(self):
+        """Stage and domain breakdown as a fixed-width text table, slowest total time first."""
+        rows = sorted(self.snapshot(), key=lambda item: item[1].total, reverse=True)
+        lines = [f"{'stage':<18} {'domain':<28} {'calls':>6} {'errors':>6} {'p50 s':>7} {'p95 s':>7} {'max s':>7} {'total s':>8}"]
+        for (stage, domain), stats in rows:
+            lines.append(
+                f"{stage:<18} {(domain or '-'):<28} {stats.count:>6} {stats.errors:>6} {stats.quantile(0.5):>7.2f} "
+                f"{stats.quantile(0.95):>7.2f} {stats.max:>7.2f} {stats.total:>8.1f}"
+            )
+        return "\n".join(lines)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+stage_metrics = StageMetrics()
+span = stage_metrics.span
+
+_server = None
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = stage_metrics.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port=METRICS_PORT):
+    """Serve /metrics on port from a background thread; 0 disables it."""
+    global _server
+    if port <= 0 or _server is not None:
+        return
+    try:
+        _server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+    except OSError as e:
+        logger.error(f"❌ [metrics] Could not serve metrics on port {port}: {e}")
+        return
+    threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info(f"📈 [metrics] Serving Prometheus metrics on http://0.0.0.0:{port}/metrics")
+
+
+def stop_metrics_server():
+    global _server
+    if _server is not None:
+        _server.shutdown()
+        _server.server_close()
+        _server = None
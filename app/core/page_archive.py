@@ -0,0 +1,163 @@
+import gzip
+import hashlib
+import os
+import queue
+import sqlite3
+import threading
+import time
+from app.core.context import current_account
+from app.settings.config import ARCHIVE_DIR, PAGE_ARCHIVE, ARCHIVE_CODEC
+from app.settings.logger import logger
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def _codec(name):
+    if name in ("auto", "zstd") and zstandard is not None:
+        return "zstd"
+    if name == "zstd":
+        logger.warning("⚠️ [page_archive] zstandard is not installed, archiving pages with gzip.")
+    return "gzip"
+
+
+def _compress(codec, data):
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress(codec, data):
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+class PageArchive:
+    """Content-addressed, compressed store of fetched pages and extraction results.
+
+    Blobs live under blobs/<sha256[:2]>/<sha256>.<codec>, so identical content is stored once. An
+    SQLite index maps (url, accountid, kind, fetched_at) to blobs. Writes are queued and done
+    by a background thread, keeping hashing, compression and disk I/O off the event loop.
+    """
+
+    def __init__(self, root=ARCHIVE_DIR, codec=ARCHIVE_CODEC):
+        self.root = root
+        self.codec = _codec(codec)
+        self.index_path = os.path.join(root, "index.sqlite3")
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def put(self, kind, url, content):
+        """Queue content for archiving; returns immediately."""
+        if not content:
+            return
+        with self._lock:
+            if self._thread is None:
+                os.makedirs(self.root, exist_ok=True)
+                self._thread = threading.Thread(target=self._run, name="page-archive", daemon=True)
+                self._thread.start()
+        self._queue.put((kind, url, current_account.get(), time.time(), content))
+
+    def _run(self):
+        conn = sqlite3.connect(self.index_path, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL,
+                accountid INTEGER,
+                kind TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                stored_size INTEGER NOT NULL,
+                codec TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_url ON pages (url, fetched_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_account ON pages (accountid)")
+
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    break
+                self._write(conn, *item)
+            except Exception as e:
+                logger.error(f"❌ [page_archive] Failed to archive {item[1] if item else ''}: {e}")
+            finally:
+                self._queue.task_done()
+        conn.close()
+
+    def _blob_path(self, sha256, codec):
+        return os.path.join(self.root, "blobs", sha256[:2], f"{sha256}.{codec}")
+
+    def _write(self, conn, kind, url, accountid, fetched_at, content):
+        data = content.encode("utf-8") if isinstance(content, str) else content
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(sha256, self.codec)
+
+        if os.path.exists(path):
+            stored_size = os.path.getsize(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            compressed = _compress(self.codec, data)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as file:
+                file.write(compressed)
+            os.replace(tmp_path, path)
+            stored_size = len(compressed)
+
+        conn.execute(
+            "INSERT INTO pages (url, accountid, kind, sha256, size, stored_size, codec, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (url, accountid, kind, sha256, len(data), stored_size, self.codec, fetched_at),
+        )
+
+    def read(self, sha256, codec=None):
+        """Return the archived content for a hash as text."""
+        codec = codec or self.codec
+        with open(self._blob_path(sha256, codec), "rb") as file:
+            return _decompress(codec, file.read()).decode("utf-8")
+
+    def find(self, url=None, accountid=None, kind=None):
+        """Index rows (newest first) matching the given URL, account and kind."""
+        if not os.path.exists(self.index_path):
+            return []
+        clauses, params = [], []
+        for column, value in (("url", url), ("accountid", accountid), ("kind", kind)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        conn = sqlite3.connect(self.index_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            rows = conn.execute(f"SELECT * FROM pages {where} ORDER BY fetched_at DESC", params).fetchall()
+        finally:
+            conn.close()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        """Write out everything still queued and stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+
+page_archive = PageArchive()
+
+
+def archive_page(url, html):
+    if PAGE_ARCHIVE:
+        page_archive.put("page", url, html)
+
+
+def archive_extraction(url, result):
+    if PAGE_ARCHIVE:
+        page_archive.put("extraction", url, result)
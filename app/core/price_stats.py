@@ -0,0 +1,69 @@
+import json
+import math
+import re
+import numpy as np
+from app.scrapers.utils import clean_openai_json
+from app.settings.logger import logger
+
+_NUMBER_PATTERN = re.compile(r"-?\d+(?:\.\d+)?")
+_PERCENTILES = (10, 25, 75, 90)
+
+
+def extract_listings(scraped_responses):
+    """Collect listing dicts from scraper / OpenAI responses, skipping malformed ones."""
+    listings = []
+    for raw_response in scraped_responses:
+        if not raw_response:
+            continue
+        data = json.loads(clean_openai_json(raw_response))
+        if isinstance(data, dict):
+            data = data.get("properties", [])
+        listings.extend(item for item in data if isinstance(item, dict))
+    return listings
+
+
+def _to_float(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = _NUMBER_PATTERN.search(value.replace(",", "").replace(" ", "").replace("\u00a0", ""))
+        if match:
+            return float(match.group())
+    return math.nan
+
+
+def per_square_meter_values(listings):
+    """Return the valid (finite, positive) price per m² values in USD as an array."""
+    values = np.fromiter(
+        (_to_float(item.get("per_square_meter_in_USD")) for item in listings),
+        dtype=float,
+        count=len(listings),
+    )
+    return values[np.isfinite(values) & (values > 0)]
+
+
+def summarise_prices(values, trim=0.1):
+    """Mean, median, trimmed mean, percentiles and count of per m² prices, rounded to whole USD."""
+    count = int(values.size)
+    if count == 0:
+        summary = {"count": 0, "average": 0, "median": 0, "trimmed_mean": 0, "min": 0, "max": 0}
+        summary.update({f"p{q}": 0 for q in _PERCENTILES})
+        return summary
+
+    ordered = np.sort(values)
+    cut = int(count * trim)
+    trimmed = ordered[cut:count - cut] if count - 2 * cut > 0 else ordered
+
+    summary = {
+        "count": count,
+        "average": int(round(ordered.mean())),
+        "median": int(round(np.median(ordered))),
+        "trimmed_mean": int(round(trimmed.mean())),
+        "min": int(round(ordered[0])),
+        "max": int(round(ordered[-1])),
+    }
+    for q, value in zip(_PERCENTILES, np.percentile(ordered, _PERCENTILES)):
+        summary[f"p{q}"] = int(round(value))
+
+    logger.info(f"📐 [summarise_prices] {summary}")
+    return summary
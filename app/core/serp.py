@@ -0,0 +1,42 @@
+import asyncio
+import json
+from serpapi import GoogleSearch
+from app.core import cassette
+from app.core.concurrency import serp_limit
+from app.core.disk_cache import DiskCache
+from app.settings.config import SERP_CACHE_TTL_SECONDS, SERP_CACHE_MAX_MB
+from app.settings.logger import logger
+
+_serp_cache = DiskCache("serp", SERP_CACHE_TTL_SECONDS, SERP_CACHE_MAX_MB * 1024 * 1024)
+
+
+def _cache_key(params):
+    query = " ".join(str(params.get("q", "")).lower().split())
+    options = {k: v for k, v in params.items() if k not in ("q", "engine", "api_key")}
+    return DiskCache.make_key(params.get("engine", "google"), query, json.dumps(options, sort_keys=True))
+
+
+async def search(params, ttl_seconds=None, accept=None):
+    """Run a SERP API query without blocking the event loop, serving repeats from the disk cache.
+
+    accept(results) can reject responses that are not worth caching; rejected ones are re-queried next time.
+    """
+    key = _cache_key(params)
+    cached = _serp_cache.get_json(key, ttl_seconds)
+    if cached is not None and (accept is None or accept(cached)):
+        logger.info(f"📦 [serp] Cache hit for query: {params.get('q')}")
+        return cached
+
+    async with serp_limit:
+        try:
+            results = await cassette.exchange("serp", key, lambda: asyncio.to_thread(lambda: GoogleSearch(params).get_dict()))
+        except cassette.CassetteMiss as e:
+            results = {"error": str(e)}
+
+    if "error" not in results and (accept is None or accept(results)):
+        _serp_cache.set_json(key, results)
+    return results
+
+
+def cache_stats():
+    return _serp_cache.stats()
@@ -1,49 +1,119 @@
 import openai
 import asyncio
-from app.settings.config import OPENAI_API_KEY, ASSISTANT_ID
+import time
+from app.settings.config import OPENAI_API_KEY, ASSISTANT_ID, CHATGPT_MODEL
 from app.settings.logger import logger
+from app.core import cassette
+from app.core.concurrency import openai_limit
+from app.openai_utils import llm_cache
+from app.openai_utils.usage import usage_tracker, TokenBudgetExceeded
 
 client = openai.AsyncOpenAI(api_key=OPENAI_API_KEY)
 
-async def get_openai_response(prompt):
-    result = ""
+def _usage(usage):
+    if usage is None:
+        return None
+    return {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens}
 
-    try:
-        logger.info("📨 [get_openai_response] Starting thread creation...")
+def _load_completion(entry):
+    # Cassettes recorded before usage accounting hold only the content
+    if isinstance(entry, str):
+        return {"content": entry, "model": None, "usage": None}
+    return entry
 
-        # Step 1: Create a Thread
-        thread = await client.beta.threads.create()
-        logger.info(f"🧵 [get_openai_response] Thread created: {thread.id}")
+async def get_chat_completion(messages, model=None, temperature=0, site="chat"):
+    """Chat completion for one call site (used for usage accounting and token budgets)."""
+    model = model or CHATGPT_MODEL
+    cache_key = llm_cache.chat_cache_key(model, messages, temperature=temperature)
+    cached = llm_cache.lookup(cache_key)
+    if cached is None:
+        # May raise TokenBudgetExceeded, or switch to the fallback model once a budget is used up
+        planned_model = usage_tracker.plan(site, model)
+        if planned_model != model:
+            model = planned_model
+            cache_key = llm_cache.chat_cache_key(model, messages, temperature=temperature)
+            cached = llm_cache.lookup(cache_key)
+    if cached is not None:
+        usage_tracker.record_cached(site, model)
+        return cached
 
-        # Step 2: Post the prompt as a message
-        await client.beta.threads.messages.create(
-            thread_id=thread.id,
-            role="user",
-            content=prompt
+    async with openai_limit:
+        started = time.perf_counter()
+        completion = await cassette.exchange(
+            "openai", cache_key, lambda: _create_chat_completion(model, temperature, messages), load=_load_completion
         )
-        logger.info("✉️ [get_openai_response] Message posted to thread.")
+        elapsed = time.perf_counter() - started
+    usage_tracker.record(site, model, completion["usage"], elapsed, completion["model"])
+    llm_cache.store(cache_key, completion["content"])
+    return completion["content"]
 
-        # Step 3: Run the Assistant
-        run = await client.beta.threads.runs.create(
-            thread_id=thread.id,
-            assistant_id=ASSISTANT_ID
-        )
-        logger.info(f"⚙️ [get_openai_response] Assistant run started: {run.id}")
+async def _create_chat_completion(model, temperature, messages):
+    response = await client.chat.completions.create(
+        model=model,
+        temperature=temperature,
+        messages=messages,
+    )
+    return {"content": response.choices[0].message.content, "model": response.model, "usage": _usage(response.usage)}
 
-        # Step 4: Wait for completion
-        while True:
-            run_status = await client.beta.threads.runs.retrieve(thread_id=thread.id, run_id=run.id)
-            if run_status.status == "completed":
-                logger.info("✅ [get_openai_response] Assistant run completed.")
-                break
-            await asyncio.sleep(1)
+async def get_openai_response(prompt, site="assistant"):
+    result = ""
 
-        # Step 5: Get the messages (assistant's reply)
-        messages = await client.beta.threads.messages.list(thread_id=thread.id)
-        result = messages.data[0].content[0].text.value
-        logger.info("📬 [get_openai_response] Response retrieved from assistant.")
+    cache_key = llm_cache.assistant_cache_key(ASSISTANT_ID, prompt)
+    cached = llm_cache.lookup(cache_key)
+    if cached is not None:
+        usage_tracker.record_cached(site, "assistant")
+        return cached
 
+    try:
+        # The assistant's model is fixed, so a used-up budget can only skip the call
+        usage_tracker.plan(site, "assistant", downgrade=False)
+        async with openai_limit:
+            started = time.perf_counter()
+            completion = await cassette.exchange("openai", cache_key, lambda: _run_assistant(prompt), load=_load_completion)
+            elapsed = time.perf_counter() - started
+        usage_tracker.record(site, "assistant", completion["usage"], elapsed, completion["model"])
+        result = completion["content"]
+        llm_cache.store(cache_key, result)
+    except TokenBudgetExceeded as e:
+        logger.warning(f"💸 [get_openai_response] Skipped {site}: {e}")
     except Exception as e:
         logger.exception(f"❌ [get_openai_response] Exception occurred: {e}")
 
     return result
+
+async def _run_assistant(prompt):
+    logger.info("📨 [get_openai_response] Starting thread creation...")
+
+    # Step 1: Create a Thread
+    thread = await client.beta.threads.create()
+    logger.info(f"🧵 [get_openai_response] Thread created: {thread.id}")
+
+    # Step 2: Post the prompt as a message
+    await client.beta.threads.messages.create(
+        thread_id=thread.id,
+        role="user",
+        content=prompt
+    )
+    logger.info("✉️ [get_openai_response] Message posted to thread.")
+
+    # Step 3: Run the Assistant
+    run = await client.beta.threads.runs.create(
+        thread_id=thread.id,
+        assistant_id=ASSISTANT_ID
+    )
+    logger.info(f"⚙️ [get_openai_response] Assistant run started: {run.id}")
+
+    # Step 4: Wait for completion
+    while True:
+        run_status = await client.beta.threads.runs.retrieve(thread_id=thread.id, run_id=run.id)
+        if run_status.status == "completed":
+            logger.info("✅ [get_openai_response] Assistant run completed.")
+            break
+        await asyncio.sleep(1)
+
+    # Step 5: Get the messages (assistant's reply)
+    messages = await client.beta.threads.messages.list(thread_id=thread.id)
+    result = messages.data[0].content[0].text.value
+    logger.info("📬 [get_openai_response] Response retrieved from assistant.")
+
+    return {"content": result, "model": run_status.model, "usage": _usage(run_status.usage)}
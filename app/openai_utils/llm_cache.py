@@ -0,0 +1,52 @@
+import copy
+import hashlib
+import json
+from app.core.disk_cache import DiskCache
+from app.settings.config import LLM_CACHE_MODE, LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_MB
+from app.settings.logger import logger
+
+_llm_cache = DiskCache("llm", LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_MB * 1024 * 1024)
+
+
+def _digest_images(messages):
+    """Replace inline base64 images with their SHA-256 so keys stay small."""
+    messages = copy.deepcopy(messages)
+    for message in messages:
+        content = message.get("content")
+        if not isinstance(content, list):
+            continue
+        for part in content:
+            image_url = part.get("image_url") if isinstance(part, dict) else None
+            if image_url and str(image_url.get("url", "")).startswith("data:"):
+                image_url["url"] = "sha256:" + hashlib.sha256(image_url["url"].encode("utf-8")).hexdigest()
+    return messages
+
+
+def chat_cache_key(model, messages, **options):
+    return DiskCache.make_key(
+        "chat", model,
+        json.dumps(_digest_images(messages), sort_keys=True, ensure_ascii=False),
+        json.dumps(options, sort_keys=True),
+    )
+
+
+def assistant_cache_key(assistant_id, prompt):
+    return DiskCache.make_key("assistant", assistant_id, prompt)
+
+
+def lookup(key):
+    if LLM_CACHE_MODE == "off":
+        return None
+    cached = _llm_cache.get_json(key)
+    if cached is not None:
+        logger.info("📦 [llm_cache] Cache hit, skipping OpenAI call.")
+    return cached
+
+
+def store(key, content):
+    if LLM_CACHE_MODE == "readwrite" and content:
+        _llm_cache.set_json(key, content)
+
+
+def cache_stats():
+    return _llm_cache.stats()
@@ -0,0 +1,141 @@
+import threading
+from app.core.context import current_account
+from app.settings.config import (
+    OPENAI_RUN_TOKEN_BUDGET, OPENAI_ACCOUNT_TOKEN_BUDGET, OPENAI_BUDGET_SKIP_SITES, OPENAI_BUDGET_FALLBACK_MODEL
+)
+from app.settings.logger import logger
+
+# USD per 1M prompt / completion tokens, matched by the longest model-name prefix
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-4": (30.00, 60.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+
+
+class TokenBudgetExceeded(Exception):
+    """Raised instead of calling OpenAI when a call site is skipped because a token budget is used up."""
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    prefix = max((p for p in MODEL_PRICES if str(model).startswith(p)), key=len, default=None)
+    if prefix is None:
+        return 0.0
+    prompt_price, completion_price = MODEL_PRICES[prefix]
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+class SiteUsage:
+    """OpenAI usage of one (call site, model) pair."""
+
+    __slots__ = ("calls", "cached", "skipped", "prompt_tokens", "completion_tokens", "seconds", "cost")
+
+    def __init__(self):
+        self.calls = self.cached = self.skipped = 0
+        self.prompt_tokens = self.completion_tokens = 0
+        self.seconds = self.cost = 0.0
+
+
+class UsageTracker:
+    """Token, latency and cost accounting of OpenAI calls per call site and per account, with run budgets.
+
+    Accounts are identified through the current_account context variable set by the account worker.
+    Budgets are checked before each call, so calls already in flight may overshoot them slightly.
+    """
+
+    def __init__(self, run_budget=OPENAI_RUN_TOKEN_BUDGET, account_budget=OPENAI_ACCOUNT_TOKEN_BUDGET):
+        self.run_budget = run_budget
+        self.account_budget = account_budget
+        self.total_tokens = 0
+        self._sites = {}
+        self._accounts = {}
+        self._lock = threading.Lock()
+
+    def _site(self, site, model):
+        usage = self._sites.get((site, model))
+        if usage is None:
+            usage = self._sites[(site, model)] = SiteUsage()
+        return usage
+
+    def exhausted(self):
+        """Name of the budget that is used up for the current account, or None."""
+        if self.run_budget and self.total_tokens >= self.run_budget:
+            return "run"
+        accountid = current_account.get()
+        if self.account_budget and accountid is not None:
+            if self._accounts.get(accountid, {}).get("tokens", 0) >= self.account_budget:
+                return f"account {accountid}"
+        return None
+
+    def plan(self, site, model, downgrade=True):
+        """Model to call for site under the budgets; raises TokenBudgetExceeded if the site is skipped."""
+        budget = self.exhausted()
+        if budget is None:
+            return model
+        if site in OPENAI_BUDGET_SKIP_SITES or not downgrade:
+            with self._lock:
+                self._site(site, model).skipped += 1
+            logger.warning(f"💸 [usage] {budget} token budget used up, skipping OpenAI call for {site}.")
+            raise TokenBudgetExceeded(f"{budget} token budget used up")
+        if OPENAI_BUDGET_FALLBACK_MODEL and model != OPENAI_BUDGET_FALLBACK_MODEL:
+            logger.info(f"💸 [usage] {budget} token budget used up, using {OPENAI_BUDGET_FALLBACK_MODEL} for {site}.")
+            return OPENAI_BUDGET_FALLBACK_MODEL
+        return model
+
+    def record(self, site, model, usage, seconds, billed_model=None):
+        """Count one completed call; usage is the response's usage block as a dict (or None).
+
+        billed_model is the model name the response reports, used for pricing when it differs from model.
+        """
+        usage = usage or {}
+        prompt_tokens = usage.get("prompt_tokens") or 0
+        completion_tokens = usage.get("completion_tokens") or 0
+        cost = estimate_cost(billed_model or model, prompt_tokens, completion_tokens)
+        accountid = current_account.get()
+        with self._lock:
+            stats = self._site(site, model)
+            stats.calls += 1
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+            stats.seconds += seconds
+            stats.cost += cost
+            self.total_tokens += prompt_tokens + completion_tokens
+            if accountid is not None:
+                account = self._accounts.setdefault(accountid, {"calls": 0, "tokens": 0, "cost": 0.0})
+                account["calls"] += 1
+                account["tokens"] += prompt_tokens + completion_tokens
+                account["cost"] += cost
+        logger.info(
+            f"🧮 [usage] {site} ({model}): {prompt_tokens} prompt + {completion_tokens} completion tokens in {seconds:.1f}s."
+        )
+
+    def record_cached(self, site, model):
+        with self._lock:
+            self._site(site, model).cached += 1
+
+    def finish_account(self, accountid):
+        """Usage of a finished account ({calls, tokens, cost}), dropped from memory."""
+        with self._lock:
+            return self._accounts.pop(accountid, None)
+
+    def summary_table(self):
+        """Call site breakdown as a fixed-width text table, most tokens first."""
+        with self._lock:
+            rows = sorted(self._sites.items(), key=lambda item: item[1].prompt_tokens + item[1].completion_tokens, reverse=True)
+            lines = [f"{'call site':<20} {'model':<24} {'calls':>6} {'cached':>6} {'skipped':>7} {'prompt':>10} {'completion':>10} {'avg s':>6} {'USD':>8}"]
+            for (site, model), usage in rows:
+                average = usage.seconds / usage.calls if usage.calls else 0.0
+                lines.append(
+                    f"{site:<20} {str(model):<24} {usage.calls:>6} {usage.cached:>6} {usage.skipped:>7} {usage.prompt_tokens:>10} "
+                    f"{usage.completion_tokens:>10} {average:>6.1f} {usage.cost:>8.3f}"
+                )
+            lines.append(f"total tokens: {self.total_tokens}, estimated cost: ${sum(u.cost for u in self._sites.values()):.3f}")
+        return "\n".join(lines)
+
+
+usage_tracker = UsageTracker()
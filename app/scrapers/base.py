@@ -1,15 +1,37 @@
 from abc import ABC, abstractmethod
-import requests
+import numpy as np
+from app.core.fx import FxRate
+from app.core.http_client import fetch
+from app.settings.logger import logger
+
 class BaseScraper(ABC):
     @abstractmethod
-    def scrape(self, url: str, usd_rate: list, index: int) -> list:
+    async def scrape(self, url: str, usd_rate: FxRate, index: int) -> list:
         pass
 
-    def safe_request(self, url, headers, timeout=30):
+    async def safe_request(self, url, headers, timeout=30):
         try:
-            response = requests.get(url, headers=headers, timeout=timeout)
+            response = await fetch(url, headers=headers, timeout=timeout)
             response.raise_for_status()
             return response
         except Exception as e:
-            print(f"❌ Request error: {e}")
-            return None
\ No newline at end of file
+            logger.error(f"❌ Request error: {e}")
+            return None
+
+    @staticmethod
+    def apply_usd_prices(properties, usd_rate: FxRate):
+        """Fill price_in_USD and per_square_meter_in_USD for all listings in one vectorized pass."""
+        if not properties:
+            return properties
+
+        prices = np.array([item['price'] for item in properties], dtype=float)
+        sizes = np.array([item['square_meter'] for item in properties], dtype=float)
+        per_sqm = np.divide(prices, sizes, out=np.zeros_like(prices), where=sizes > 0)
+
+        prices_usd = np.round(usd_rate.convert(prices)).astype(int)
+        per_sqm_usd = np.round(usd_rate.convert(per_sqm)).astype(int)
+
+        for item, price_usd, sqm_usd in zip(properties, prices_usd.tolist(), per_sqm_usd.tolist()):
+            item['price_in_USD'] = price_usd
+            item['per_square_meter_in_USD'] = sqm_usd
+        return properties
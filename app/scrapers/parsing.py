@@ -0,0 +1,151 @@
+from app.settings.config import SCRAPER_PARSER
+from app.settings.logger import logger
+
+
+def _strip_join(strings):
+    """Same text as BeautifulSoup's get_text(strip=True)."""
+    return "".join(text.strip() for text in strings if text and text.strip())
+
+
+class SoupBackend:
+    name = "bs4"
+
+    def __init__(self):
+        from bs4 import BeautifulSoup
+        self._soup = BeautifulSoup
+
+    def parse(self, html):
+        return self._soup(html, "html.parser")
+
+    def compile(self, selector):
+        return selector
+
+    def select(self, node, selector):
+        return node.select(selector)
+
+    def select_one(self, node, selector):
+        return node.select_one(selector)
+
+    def text(self, node):
+        return node.get_text(strip=True)
+
+    def attr(self, node, name, default=""):
+        value = node.get(name, default)
+        return " ".join(value) if isinstance(value, list) else value
+
+
+class LxmlBackend:
+    name = "lxml"
+
+    def __init__(self):
+        import lxml.html
+        from lxml.cssselect import CSSSelector
+        self._fromstring = lxml.html.document_fromstring
+        self._parser = lxml.html.HTMLParser(encoding="utf-8")
+        self._css = CSSSelector
+
+    def parse(self, html):
+        # Parse from bytes so pages with an XML encoding declaration are accepted
+        return self._fromstring(html.encode("utf-8"), parser=self._parser)
+
+    def compile(self, selector):
+        return self._css(selector, translator="html")
+
+    def select(self, node, selector):
+        return selector(node)
+
+    def select_one(self, node, selector):
+        matches = selector(node)
+        return matches[0] if matches else None
+
+    def text(self, node):
+        return _strip_join(node.itertext())
+
+    def attr(self, node, name, default=""):
+        return node.get(name, default)
+
+
+class SelectolaxBackend:
+    name = "selectolax"
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self._parser = LexborHTMLParser
+
+    def parse(self, html):
+        return self._parser(html)
+
+    def compile(self, selector):
+        return selector
+
+    def select(self, node, selector):
+        return node.css(selector)
+
+    def select_one(self, node, selector):
+        return node.css_first(selector)
+
+    def text(self, node):
+        return node.text(deep=True, separator="", strip=True)
+
+    def attr(self, node, name, default=""):
+        value = node.attributes.get(name)
+        return default if value is None else value
+
+
+_BACKENDS = {
+    "selectolax": SelectolaxBackend,
+    "lxml": LxmlBackend,
+    "bs4": SoupBackend,
+}
+
+
+def load_backend(name=SCRAPER_PARSER):
+    """Return the requested parser backend, or the fastest installed one for "auto"."""
+    candidates = list(_BACKENDS) if name == "auto" else [name, "bs4"]
+    for candidate in candidates:
+        try:
+            backend = _BACKENDS[candidate]()
+            logger.info(f"🧩 [parsing] Using {backend.name} HTML parser backend.")
+            return backend
+        except (ImportError, KeyError) as e:
+            logger.warning(f"⚠️ [parsing] Parser backend '{candidate}' unavailable: {e}")
+    raise ImportError("No HTML parser backend available")
+
+
+backend = load_backend()
+
+
+class Document:
+    """Backend-neutral wrapper around a parsed page or element."""
+
+    __slots__ = ("node",)
+
+    def __init__(self, node):
+        self.node = node
+
+    def select(self, selector):
+        return [Document(node) for node in backend.select(self.node, selector)]
+
+    def select_one(self, selector):
+        node = backend.select_one(self.node, selector)
+        return None if node is None else Document(node)
+
+    def text(self):
+        return backend.text(self.node)
+
+    def get(self, name, default=""):
+        return backend.attr(self.node, name, default)
+
+    def __getitem__(self, name):
+        value = backend.attr(self.node, name, None)
+        if value is None:
+            raise KeyError(name)
+        return value
+
+
+def parse_document(html):
+    return Document(backend.parse(html))
+
+
+def compile_selectors(selectors):
+    return {name: backend.compile(selector) for name, selector in selectors.items()}
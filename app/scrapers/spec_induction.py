@@ -0,0 +1,196 @@
+import json
+import os
+import re
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.parse import urlparse
+from bs4 import BeautifulSoup
+from app.scrapers.spec_scraper import parse_listings
+from app.settings.config import LEARNED_SPEC_DIR, LEARN_MIN_LISTINGS, LEARN_MIN_RECALL
+from app.settings.logger import logger
+
+try:
+    import lxml  # noqa: F401
+    _PARSER = "lxml"
+except ImportError:
+    _PARSER = "html.parser"
+
+_WHITESPACE = re.compile(r"\s+")
+_CSS_CLASS = re.compile(r"^[A-Za-z_][\w-]*$")
+_DECIMALS = re.compile(r"[.,]\d{1,2}$")
+_AREA_UNIT = r"\d\s*(m²|m2|sqm|m&#xB2;)"
+_AREA = re.compile(_AREA_UNIT, re.IGNORECASE)
+
+# Ancestors of a matched title/price pair searched for an <a href> wrapping the whole card
+MAX_LINK_CLIMB = 3
+MAX_PRICE_CHARS = 40
+MAX_AREA_CHARS = 30
+
+
+def _key(text):
+    """Text as the spec engine sees it, with all whitespace dropped and lowercased for matching."""
+    return _WHITESPACE.sub("", str(text)).lower()
+
+
+def _price_digits(value):
+    if isinstance(value, float):
+        value = int(value)
+    return "".join(filter(str.isdigit, _DECIMALS.sub("", str(value).strip())))
+
+
+def _classes(tag):
+    return tuple(sorted(c for c in tag.get("class", []) if _CSS_CLASS.match(c)))
+
+
+def _selector(tag):
+    return tag.name + "".join(f".{c}" for c in _classes(tag))
+
+
+def _deepest(tags):
+    return max(tags, key=lambda tag: len(list(tag.parents))) if tags else None
+
+
+def _field_node(node, card):
+    """Climb from a matched node to the nearest ancestor with usable classes that still holds the same text."""
+    text = _key(node.get_text(strip=True))
+    while not _classes(node) and node.parent is not card and _key(node.parent.get_text(strip=True)) == text:
+        node = node.parent
+    return node
+
+
+def _card_for(title_node, price_node):
+    ancestors = {id(a) for a in title_node.parents}
+    card = next((a for a in price_node.parents if id(a) in ancestors), None)
+    if card is None:
+        return None
+    for ancestor in [card] + list(card.parents)[:MAX_LINK_CLIMB]:
+        if ancestor.name == "a" and ancestor.get("href"):
+            return ancestor
+    while card is not None and card.name != "body" and not _classes(card):
+        card = card.parent
+    return card if card is not None and card.name != "body" else None
+
+
+def _most_common(values, minimum):
+    counts = Counter(v for v in values if v)
+    if not counts:
+        return None
+    value, count = counts.most_common(1)[0]
+    return value if count >= minimum else None
+
+
+def induce_spec(domain, page_url, html, listings):
+    """Infer a scraper spec for a page from the listings the LLM extracted from it.
+
+    Each listing's title and price are matched back to DOM nodes; the repeated card and field
+    selectors are generalised from those matches and the spec is accepted only if parsing the
+    same page with it recovers at least LEARN_MIN_RECALL of the LLM's listings. Runs in the CPU pool.
+    """
+    wanted = [
+        (_key(item.get("title", "")), _price_digits(item.get("price", "")), _key(item.get("description", "")))
+        for item in listings if isinstance(item, dict)
+    ]
+    wanted = [w for w in wanted if w[0] and w[1]]
+    if len(wanted) < LEARN_MIN_LISTINGS:
+        return None
+
+    soup = BeautifulSoup(html, _PARSER)
+    by_text, by_digits = {}, {}
+    for tag in soup.find_all(True):
+        text = tag.get_text(strip=True)
+        by_text.setdefault(_key(text), []).append(tag)
+        if len(text) <= MAX_PRICE_CHARS:
+            by_digits.setdefault("".join(filter(str.isdigit, text)), []).append(tag)
+
+    matches = []
+    for title, price, description in wanted:
+        title_node = _deepest(by_text.get(title, []))
+        price_node = _deepest(by_digits.get(price, []))
+        if title_node is None or price_node is None:
+            continue
+        card = _card_for(title_node, price_node)
+        if card is not None:
+            matches.append((card, title_node, price_node, _deepest(by_text.get(description, [])) if description else None))
+
+    card_selector = _most_common([_selector(card) for card, *_ in matches], LEARN_MIN_LISTINGS)
+    if not card_selector:
+        logger.info(f"🧪 [induce_spec] {domain}: no repeated card structure ({len(matches)}/{len(wanted)} listings matched).")
+        return None
+    matches = [m for m in matches if _selector(m[0]) == card_selector]
+    minimum = max(LEARN_MIN_LISTINGS, len(matches) // 2)
+
+    fields = {}
+    title_selector = _most_common([_selector(_field_node(t, c)) for c, t, _, _ in matches], minimum)
+    price_selector = _most_common([_selector(_field_node(p, c)) for c, _, p, _ in matches], minimum)
+    if not title_selector or not price_selector:
+        return None
+    fields["title"] = {"selector": title_selector, "default": "N/A"}
+
+    description_selector = _most_common(
+        [_selector(_field_node(d, c)) for c, _, _, d in matches if d is not None and any(p is c for p in d.parents)], minimum
+    )
+    if description_selector:
+        fields["description"] = {"selector": description_selector, "default": "N/A"}
+
+    fields["price"] = {"selector": price_selector, "digits_only": True, "type": "int"}
+
+    areas = []
+    for card, *_ in matches:
+        nodes = [t for t in card.find_all(True) if len(t.get_text(strip=True)) <= MAX_AREA_CHARS and _AREA.search(t.get_text(strip=True))]
+        if nodes:
+            areas.append(_selector(_field_node(_deepest(nodes), card)))
+    area_selector = _most_common(areas, minimum)
+    if not area_selector:
+        # Listings without a size have no price per m², so such a spec would only crowd out usable pages
+        logger.info(f"🧪 [induce_spec] {domain}: no floor area found in the listing cards.")
+        return None
+    fields["square_meter"] = {
+        "selector": area_selector, "where_text": _AREA_UNIT,
+        "before": "m", "digits_only": True, "type": "int", "default": 0,
+    }
+
+    if matches[0][0].name == "a":
+        fields["details_url"] = {"attr": "href", "type": "url"}
+    elif all(card.find("a", href=True) for card, *_ in matches):
+        fields["details_url"] = {"selector": "a[href]", "attr": "href", "type": "url", "default": ""}
+
+    parsed = urlparse(page_url)
+    spec = {
+        "name": f"LearnedScraper[{domain}]",
+        "domain": domain,
+        "base_url": f"{parsed.scheme}://{parsed.netloc}",
+        "card": card_selector,
+        "fields": fields,
+        "required": ["price"],
+        "learned": {"source_url": page_url, "learned_at": int(time.time()), "matched": len(matches)},
+    }
+
+    # Check the spec against the page it was learned from
+    card_count, properties, _ = parse_listings(spec, html, page_url)
+    found = {(_key(p["title"]), str(p["price"])) for p in properties}
+    recall = sum((title, price) in found for title, price, _ in wanted) / len(wanted)
+    spec["learned"]["recall"] = round(recall, 2)
+    if recall < LEARN_MIN_RECALL:
+        logger.info(f"🧪 [induce_spec] {domain}: rejected spec '{card_selector}', recall {recall:.0%} on {card_count} cards.")
+        return None
+
+    logger.info(f"🧪 [induce_spec] {domain}: learned spec '{card_selector}', recall {recall:.0%} on {card_count} cards.")
+    return spec
+
+
+def save_learned_spec(spec, spec_dir=LEARNED_SPEC_DIR):
+    os.makedirs(spec_dir, exist_ok=True)
+    path = Path(spec_dir) / f"{spec['domain']}.json"
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(spec, file, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    logger.info(f"💾 [save_learned_spec] Saved learned scraper spec to {path}")
+
+
+def forget_learned_spec(domain, spec_dir=LEARNED_SPEC_DIR):
+    path = Path(spec_dir) / f"{domain}.json"
+    if path.exists():
+        path.unlink()
+        logger.info(f"🗑️ [forget_learned_spec] Removed learned scraper spec {path}")
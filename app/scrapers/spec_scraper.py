@@ -0,0 +1,264 @@
+import asyncio
+import json
+import re
+from pathlib import Path
+from urllib.parse import urljoin, urlparse, urlencode, parse_qsl
+from app.scrapers.base import BaseScraper
+from app.scrapers.parsing import parse_document, compile_selectors
+from app.scrapers.utils import fallback_scraper
+from app.core.cpu_pool import run_cpu
+from app.core.http_client import is_truncated
+from app.core.page_archive import archive_page
+from app.core.fx import FxRate
+from app.settings.config import SCRAPER_SPEC_DIR, SCRAPER_MAX_PAGES, SCRAPER_PAGE_CONCURRENCY, SCRAPER_RECORD_TARGET
+from app.settings.logger import logger
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Key order and defaults of the listing dicts returned by every scraper
+LISTING_DEFAULTS = {
+    'title': 'N/A',
+    'description': 'N/A',
+    'price': 0,
+    'price_in_USD': 0,
+    'square_meter': 0,
+    'per_square_meter_in_USD': 0,
+    'details_url': '',
+}
+
+_CARD = '__card__'
+_PAGE_LINKS = '__page_links__'
+
+# Compiled selectors per spec, built lazily in whichever process parses the page
+_compiled = {}
+
+
+def _selectors_for(spec):
+    key = json.dumps(spec, sort_keys=True)
+    selectors = _compiled.get(key)
+    if selectors is None:
+        raw = {_CARD: spec['card']}
+        raw.update({name: rule['selector'] for name, rule in spec['fields'].items() if 'selector' in rule})
+        if spec.get('pagination', {}).get('links'):
+            raw[_PAGE_LINKS] = spec['pagination']['links']
+        selectors = _compiled[key] = compile_selectors(raw)
+    return selectors
+
+
+def _clean(value, rule, page_url):
+    """Apply a field's cleanup rules in a fixed order: before, strip, digits_only, then type."""
+    if 'before' in rule:
+        value = value.split(rule['before'])[0]
+    for text in rule.get('strip', ()):
+        value = value.replace(text, '')
+    if rule.get('digits_only'):
+        value = ''.join(filter(str.isdigit, value))
+
+    kind = rule.get('type', 'text')
+    if kind == 'int':
+        return int(value) if value.isdigit() else 0
+    if kind == 'url':
+        return urljoin(page_url, value)
+    return value
+
+
+def _field(card, name, rule, selectors, page_url):
+    if 'selector' not in rule:
+        node = card
+    elif 'where_attr' in rule:
+        (attr, needle), = rule['where_attr'].items()
+        node = next((n for n in card.select(selectors[name]) if needle in n.get(attr, '').lower()), None)
+    elif 'where_text' in rule:
+        pattern = re.compile(rule['where_text'], re.IGNORECASE)
+        node = next((n for n in card.select(selectors[name]) if pattern.search(n.text())), None)
+    else:
+        node = card.select_one(selectors[name])
+
+    if node is None:
+        if 'default' in rule:
+            return rule['default']
+        raise ValueError(f"no element for '{name}'")
+
+    value = node[rule['attr']] if 'attr' in rule else node.text()
+    return _clean(value, rule, page_url)
+
+
+def parse_listings(spec, html, page_url):
+    """Parse one result page with a spec; runs in the CPU pool.
+
+    Returns (card count, listing dicts, pagination URLs) as plain data.
+    """
+    selectors = _selectors_for(spec)
+    soup = parse_document(html)
+    cards = soup.select(selectors[_CARD])
+    base_url = spec.get('base_url') or page_url
+
+    properties = []
+    for card in cards:
+        try:
+            values = {name: _field(card, name, rule, selectors, base_url) for name, rule in spec['fields'].items()}
+            if all(values.get(name) for name in spec.get('required', ())):
+                # USD fields are filled for the whole page by apply_usd_prices
+                listing = {name: values.get(name, default) for name, default in LISTING_DEFAULTS.items()}
+                listing.update(values)
+                properties.append(listing)
+        except Exception as e:
+            logger.warning(f"⚠️ [{spec['name']}] Error parsing card: {e}")
+
+    # Numbered pagination links in page order, or every other link (e.g. "Next") if none are numbered
+    numbered, other = {}, []
+    if _PAGE_LINKS in selectors:
+        for link in soup.select(selectors[_PAGE_LINKS]):
+            url = urljoin(page_url, link.get('href', ''))
+            if url == page_url or urlparse(url).netloc != urlparse(page_url).netloc:
+                continue
+            label = link.text()
+            if label.isdigit():
+                if int(label) > 1:
+                    numbered.setdefault(int(label), url)
+            elif url not in other:
+                other.append(url)
+    page_urls = list(dict.fromkeys(numbered[page] for page in sorted(numbered))) or other
+
+    return len(cards), properties, page_urls
+
+
+class SpecScraper(BaseScraper):
+    """Generic scraper driven by a per-domain JSON spec (see app/scrapers/specs)."""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.name = spec['name']
+        self.learned = 'learned' in spec
+        self.pagination = spec.get('pagination', {})
+        self.max_pages = min(self.pagination.get('max_pages', 1), SCRAPER_MAX_PAGES)
+        self.headers = spec.get('headers', DEFAULT_HEADERS)
+
+    async def fetch_page(self, url):
+        """Fetch a result page, falling back to ScraperAPI; None if no complete page could be fetched."""
+        response = await self.safe_request(url, self.headers)
+        if response is None or response.status_code != 200 or is_truncated(response):
+            logger.info(f"❌ [{self.name}] Response invalid, failed or truncated. Trying fallback_scraper...")
+            response = await fallback_scraper(url)
+        if is_truncated(response):
+            logger.warning(f"⚠️ [{self.name}] Page {url} is larger than HTTP_MAX_BYTES, skipping it.")
+            return None
+        return response
+
+    async def scrape(self, url: str, usd_rate: FxRate, i: int) -> list:
+        """Priced listings of url; None if the page could not be scraped at all, [] if it has no listings."""
+        logger.info(f"🤖 [{self.name}] Scraper started, fetching page...")
+
+        try:
+            if not usd_rate.rate:
+                logger.info(f"❌ [{self.name}] No USD rate available for {usd_rate.pair}")
+                return None
+
+            response = await self.fetch_page(url)
+            if response is None:
+                logger.info(f"❌ [{self.name}] Failed to fetch HTML from both sources")
+                return None
+            logger.info(f"✅ [{self.name}] HTML fetched successfully.")
+
+            card_count, properties, page_urls = await run_cpu(parse_listings, self.spec, response.text, url)
+            if not card_count:
+                logger.info(f"❌ [{self.name}] No listing cards found on {url}")
+                return []
+
+        except Exception as e:
+            logger.error(f"❌ [{self.name}] Unexpected error: {e}")
+            return None
+
+        archive_page(url, response.text)
+
+        if self.max_pages > 1:
+            properties = await self.scrape_more_pages(url, page_urls, properties)
+
+        logger.info(f"✅ [{self.name}] total cards on first page: {card_count}, priced listings: {len(properties)}")
+        return self.apply_usd_prices(properties, usd_rate)
+
+    def next_page_urls(self, url, page_urls):
+        """Further result pages: the pagination links found on the first page, else URLs built from the spec."""
+        if not page_urls:
+            pages = range(2, self.max_pages + 1)
+            parsed = urlparse(url)
+            if 'page_param' in self.pagination:
+                query = dict(parse_qsl(parsed.query))
+                page_urls = [
+                    parsed._replace(query=urlencode({**query, self.pagination['page_param']: page})).geturl()
+                    for page in pages
+                ]
+            elif 'page_path' in self.pagination:
+                page_urls = [
+                    parsed._replace(path=parsed.path.rstrip('/') + self.pagination['page_path'].format(page=page)).geturl()
+                    for page in pages
+                ]
+        return page_urls[:self.max_pages - 1]
+
+    async def scrape_page(self, url):
+        """Listings and pagination URLs of one further result page."""
+        try:
+            page = await self.fetch_page(url)
+            if page is None:
+                logger.warning(f"⚠️ [{self.name}] Failed to fetch page {url}")
+                return [], []
+            archive_page(url, page.text)
+            _, properties, page_urls = await run_cpu(parse_listings, self.spec, page.text, url)
+            return properties, page_urls
+        except Exception as e:
+            logger.warning(f"⚠️ [{self.name}] Failed to scrape page {url}: {e}")
+            return [], []
+
+    async def scrape_more_pages(self, url, page_urls, properties):
+        """Fetch further result pages concurrently, SCRAPER_PAGE_CONCURRENCY at a time, until
+        SCRAPER_RECORD_TARGET listings with a usable size are collected or the page cap is reached.
+
+        Pagination links on the fetched pages are followed too, so a pager that only links to the
+        next page ("Next") still reaches max_pages, one page per round.
+        """
+        pending = self.next_page_urls(url, page_urls)
+        queued = {url, *pending}
+        seen = {item['details_url'] for item in properties}
+        fetched = 1
+
+        while pending and _usable(properties) < SCRAPER_RECORD_TARGET:
+            window, pending = pending[:SCRAPER_PAGE_CONCURRENCY], pending[SCRAPER_PAGE_CONCURRENCY:]
+            for more, more_page_urls in await asyncio.gather(*(self.scrape_page(page_url) for page_url in window)):
+                # Promoted listings repeat across pages
+                for item in more:
+                    if not item['details_url'] or item['details_url'] not in seen:
+                        seen.add(item['details_url'])
+                        properties.append(item)
+                for page_url in more_page_urls:
+                    if page_url not in queued and fetched + len(window) + len(pending) < self.max_pages:
+                        queued.add(page_url)
+                        pending.append(page_url)
+            fetched += len(window)
+
+        logger.info(f"📑 [{self.name}] {fetched} result pages scraped, {_usable(properties)} listings with a usable size.")
+        return properties
+
+
+def _usable(properties):
+    return sum(1 for item in properties if item['price'] > 0 and item['square_meter'] > 0)
+
+
+def load_spec_registry(spec_dir=SCRAPER_SPEC_DIR):
+    """Build {domain: SpecScraper} from every *.json spec in spec_dir; invalid specs are skipped."""
+    registry = {}
+    for path in sorted(Path(spec_dir).glob("*.json")):
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                spec = json.load(file)
+            missing = [key for key in ('domain', 'card', 'fields') if key not in spec]
+            if missing:
+                raise ValueError(f"missing keys {missing}")
+            spec.setdefault('name', spec['domain'])
+            registry[spec['domain']] = SpecScraper(spec)
+        except Exception as e:
+            logger.error(f"❌ [load_spec_registry] Skipping scraper spec {path.name}: {e}")
+
+    logger.info(f"🧩 [load_spec_registry] Loaded {len(registry)} scraper specs: {', '.join(registry)}")
+    return registry
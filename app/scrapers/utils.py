@@ -1,6 +1,6 @@
 import json
 from app.settings.logger import logger
-import requests
+from app.core.http_client import fetch
 from app.settings.config import SCRAPER_API
 
 def clean_openai_json(raw_response: str) -> str:
@@ -19,14 +19,14 @@ def clean_openai_json(raw_response: str) -> str:
 
     return "[]"
 
-def fallback_scraper(url):
+async def fallback_scraper(url):
     print("🔄 Using fallback scraper...")
     payload = {
         'api_key': SCRAPER_API,  # Use your actual API key
         'url': url
     }
     try:
-        response = requests.get('https://api.scraperapi.com/', params=payload, timeout=30)
+        response = await fetch('https://api.scraperapi.com/', params=payload, timeout=30)
         response.raise_for_status()
         print("✅ Fallback scraper succeeded.")
         return response
@@ -0,0 +1,47 @@
+import asyncio
+from app.core.concurrency import run_db
+from app.settings.config import READ_PAGE_SIZE, SHARD_COUNT, SHARD_INDEX, READ_PAGE_ATTEMPTS
+from app.settings.logger import logger
+
+# Lower bound for the first keyset page (accountid is a signed INT)
+MIN_ACCOUNTID = -2 ** 31
+
+
+async def _read_page(db, after_accountid, page_size, shard_count, shard_index):
+    """One keyset page, retried with exponential backoff so a transient database error doesn't end the run."""
+    for attempt in range(1, READ_PAGE_ATTEMPTS + 1):
+        try:
+            return await run_db(db.read_user_data_page, after_accountid, page_size, shard_count, shard_index)
+        except Exception as e:
+            if attempt == READ_PAGE_ATTEMPTS:
+                logger.error(f"❌ [iter_accounts] Reading the page after accountid {after_accountid} failed {attempt} times: {e}")
+                raise
+            delay = 2 ** (attempt - 1)
+            logger.warning(
+                f"⚠️ [iter_accounts] Reading the page after accountid {after_accountid} failed, retrying in {delay}s: {e}"
+            )
+            await asyncio.sleep(delay)
+
+
+async def iter_accounts(db, page_size=READ_PAGE_SIZE, shard_count=SHARD_COUNT, shard_index=SHARD_INDEX):
+    """Yield unprocessed accounts page by page, fetching the next page while the current one is consumed."""
+    if not 0 <= shard_index < shard_count:
+        raise ValueError(f"SHARD_INDEX must be in [0, {shard_count}), got {shard_index}")
+
+    logger.info(f"📊 [iter_accounts] Reading shard {shard_index}/{shard_count} in pages of {page_size}.")
+    total = 0
+    next_page = asyncio.create_task(_read_page(db, MIN_ACCOUNTID, page_size, shard_count, shard_index))
+    try:
+        while next_page is not None:
+            page = await next_page
+            next_page = None
+            if len(page) == page_size:
+                next_page = asyncio.create_task(_read_page(db, page[-1]["accountid"], page_size, shard_count, shard_index))
+
+            total += len(page)
+            logger.info(f"📊 Client records fetched: {total}")
+            for row in page:
+                yield row
+    finally:
+        if next_page is not None:
+            next_page.cancel()
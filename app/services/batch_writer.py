@@ -0,0 +1,67 @@
+import asyncio
+import time
+from app.core.concurrency import run_db
+from app.core.metrics import span
+from app.settings.config import BATCH_MAX_ROWS, BATCH_MAX_SECONDS
+from app.settings.logger import logger
+
+
+class CostBatchWriter:
+    """Collects client_location_cost rows and upserts them in one transaction per flush."""
+
+    def __init__(self, db, max_rows=BATCH_MAX_ROWS, max_seconds=BATCH_MAX_SECONDS, on_flush=None):
+        self.db = db
+        self.on_flush = on_flush
+        self.max_rows = max_rows
+        self.max_seconds = max_seconds
+        self.rows = []
+        self.flushes = 0
+        self.rows_written = 0
+        self._lock = asyncio.Lock()
+        self._timer = None
+
+    async def __aenter__(self):
+        self._timer = asyncio.create_task(self._flush_periodically())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._timer.cancel()
+        await asyncio.gather(self._timer, return_exceptions=True)
+        await self.flush()
+        logger.info(f"💾 [CostBatchWriter] {self.rows_written} rows written in {self.flushes} flush(es).")
+
+    async def add(self, data):
+        self.rows.extend(data)
+        if len(self.rows) >= self.max_rows:
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            if not self.rows:
+                return
+            batch, self.rows = self.rows, []
+
+            started = time.perf_counter()
+            try:
+                with span("db_write"):
+                    written = await run_db(self.db.upsert_cost_data_batch, batch)
+            except Exception as e:
+                logger.exception(f"❌ [CostBatchWriter] Flush of {len(batch)} rows failed, keeping them for the next flush: {e}")
+                self.rows = batch + self.rows
+                return
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.flushes += 1
+            self.rows_written += written
+            logger.info(f"💾 [CostBatchWriter] Flushed {written} rows in {elapsed_ms:.0f} ms ({elapsed_ms / written:.1f} ms/row).")
+
+            if self.on_flush is not None:
+                try:
+                    await self.on_flush([row[0] for row in batch])
+                except Exception as e:
+                    logger.exception(f"❌ [CostBatchWriter] on_flush callback failed: {e}")
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.max_seconds)
+            await self.flush()
@@ -0,0 +1,82 @@
+import json
+import os
+import threading
+import time
+from app.settings.config import CHECKPOINT_PATH
+from app.settings.logger import logger
+
+STAGES = ("serp", "scrape", "stats", "image", "address", "write")
+
+
+class AccountCheckpoint:
+    """Stage results of one account, as seen by the pipeline."""
+
+    def __init__(self, journal, accountid):
+        self.journal = journal
+        self.accountid = accountid
+
+    def get(self, stage):
+        return self.journal.get(self.accountid, stage)
+
+    def record(self, stage, payload):
+        self.journal.record(self.accountid, stage, payload)
+
+
+class CheckpointJournal:
+    """Append-only JSONL journal of finished (accountid, stage) results."""
+
+    def __init__(self, path=CHECKPOINT_PATH):
+        self.path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._file = None
+        if not path:
+            return
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._load()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A crash can leave a torn last line
+                        continue
+                    self._entries.setdefault(entry["accountid"], {})[entry["stage"]] = entry["payload"]
+        except FileNotFoundError:
+            return
+
+        # Accounts that reached the database need no resume data; compact them away
+        finished = [accountid for accountid, stages in self._entries.items() if "write" in stages]
+        for accountid in finished:
+            del self._entries[accountid]
+        with open(self.path + ".tmp", "w", encoding="utf-8") as file:
+            for accountid, stages in self._entries.items():
+                for stage, payload in stages.items():
+                    file.write(json.dumps({"accountid": accountid, "stage": stage, "payload": payload}) + "\n")
+        os.replace(self.path + ".tmp", self.path)
+        logger.info(f"📒 [CheckpointJournal] {len(self._entries)} account(s) can resume from {self.path}.")
+
+    def for_account(self, accountid):
+        return AccountCheckpoint(self, accountid)
+
+    def get(self, accountid, stage):
+        return self._entries.get(accountid, {}).get(stage)
+
+    def record(self, accountid, stage, payload=True):
+        if stage not in STAGES:
+            raise ValueError(f"Unknown checkpoint stage: {stage}")
+        with self._lock:
+            self._entries.setdefault(accountid, {})[stage] = payload
+            if self._file is not None:
+                self._file.write(json.dumps({"accountid": accountid, "stage": stage, "payload": payload, "at": time.time()}) + "\n")
+                self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -1,30 +1,40 @@
 import json
 from urllib.parse import urlparse
-from serpapi import GoogleSearch
 import asyncio
 
-from app.scrapers.privateproperty_scraper import PrivatePropertyScraper
-from app.scrapers.property24_scraper import Property24Scraper
-from app.scrapers.utils import clean_openai_json
+from app.scrapers.spec_scraper import SpecScraper, load_spec_registry
+from app.scrapers.spec_induction import induce_spec, save_learned_spec, forget_learned_spec
 from app.core.html_processing import fetch_html, fetch_openAI_results
 from app.core.cost_analysis import get_average_price_people_type
 from app.core.image_analysis import analyse_location_image
 from app.core.address_analysis import get_cost, get_average_cost, get_neighbourhood_address, analyse_address_using_openai
-from app.settings.config import SERP_API_KEY
+from app.core.concurrency import run_db
+from app.core.cpu_pool import run_cpu
+from app.core.cassette import cassette_stats
+from app.core.metrics import span, stage_metrics, start_metrics_server, stop_metrics_server
+from app.core.context import current_account
+from app.core.page_archive import page_archive, archive_page, archive_extraction
+from app.core.price_stats import extract_listings, per_square_meter_values
+from app.core.serp import search, cache_stats
+from app.core.fx import get_usd_rate
+from app.openai_utils import llm_cache
+from app.openai_utils.usage import usage_tracker
+from app.services.batch_writer import CostBatchWriter
+from app.services.account_reader import iter_accounts
+from app.services.work_claims import LeaseClaimer
+from app.services.checkpoint import CheckpointJournal
+from app.settings.config import (
+    SERP_API_KEY, MAX_WORKERS, ACCOUNT_DELAY_SECONDS, SERP_LINK_FANOUT, WORK_MODE,
+    SELECTOR_LEARNING, LEARNED_SPEC_DIR, LEARN_MIN_LISTINGS, DB_BACKEND, REPLAY_MODE
+)
 from app.settings.logger import logger
 from database import Database
-from pathlib import Path
+from sqlite_database import SqliteDatabase
 
-LOG_DIR = Path(__file__).resolve().parent.parent / "log"
-LOG_DIR.mkdir(exist_ok=True)
-
-SCRAPER_REGISTRY = {
-    'property24.com': Property24Scraper(),
-    'privateproperty.co.za': PrivatePropertyScraper(),
-}
-
-# cache dictionary for currency conversion
-conversion_cache = {}
+# One spec-driven scraper per domain in app/scrapers/specs, plus specs learned on earlier runs
+SCRAPER_REGISTRY = load_spec_registry()
+for _domain, _scraper in load_spec_registry(LEARNED_SPEC_DIR).items():
+    SCRAPER_REGISTRY.setdefault(_domain, _scraper)
 
 def extract_domain(link):
     try:
@@ -35,46 +45,90 @@ def extract_domain(link):
     except Exception:
         return ""
 
-async def cost_in_dollar(country):
-    if country in conversion_cache:
-        logger.info(f"📦 [cost_in_dollar] Using cached rate for {country}")
-        return conversion_cache[country]
-
-    logger.info(f"📊 [cost_in_dollar] Fetching conversion rate for {country}...")
-    params = {
-        "engine": "google",
-        "q": f"1 {country} currency in USD",
-        "api_key": SERP_API_KEY,
-    }
-
-    search = GoogleSearch(params)
-    results = search.get_dict()
-    organic_results = results.get("organic_results", [])
-    wise_snippets = [result['snippet_highlighted_words'] for result in organic_results if result.get('source') == 'Wise']
+async def learn_scraper(domain, url, html_data, opneAI_response):
+    """Induce a spec for domain from the listings OpenAI extracted, so later pages skip the LLM."""
+    try:
+        listings = extract_listings([opneAI_response])
+        if len(listings) < LEARN_MIN_LISTINGS:
+            return
+        spec = await run_cpu(induce_spec, domain, url, html_data, listings)
+        if spec:
+            save_learned_spec(spec)
+            SCRAPER_REGISTRY[domain] = SpecScraper(spec)
+            logger.info(f"🎓 [learn_scraper] {domain} will be scraped locally from now on.")
+    except Exception as e:
+        logger.warning(f"⚠️ [learn_scraper] Selector induction failed for {domain}: {e}")
+
+async def scrape_link(i, link_url, usd_rate):
+    logger.info(f"🌍 [get_scrap_results] Fetching from: {link_url}")
+
+    domain = extract_domain(link_url)
+    scraper = SCRAPER_REGISTRY.get(domain)
+    opneAI_response = None
+    if scraper:
+        logger.info(f"🔍 Using dynamic scraper for {domain}")
+        with span("scraper", domain) as stage:
+            properties = await scraper.scrape(link_url, usd_rate, i)
+            # A fetched page without listings is a result, not a scraper error
+            if properties is None:
+                stage.fail()
+        opneAI_response = json.dumps(properties or [])
+
+        if properties is not None and not per_square_meter_values(properties).size and scraper.learned:
+            # The page was fetched but the site changed or the spec was too narrow:
+            # unlearn it and let OpenAI (and relearning) take over
+            logger.warning(f"⚠️ Learned scraper for {domain} found no listings with a size, falling back to OpenAI extraction.")
+            SCRAPER_REGISTRY.pop(domain, None)
+            forget_learned_spec(domain)
+            opneAI_response = None
+
+    if opneAI_response is None:
+        with span("fetch_html", domain) as stage:
+            html_data = await fetch_html(link_url)
+            if html_data is None:
+                stage.fail()
+        logger.info(f"✅ HTML content fetched from link {i + 1}")
+        archive_page(link_url, html_data)
+
+        with span("openai_extraction", domain) as stage:
+            opneAI_response = await fetch_openAI_results(html_data, usd_rate)
+            if not opneAI_response:
+                stage.fail()
+
+        if SELECTOR_LEARNING and domain and domain not in SCRAPER_REGISTRY:
+            await learn_scraper(domain, link_url, html_data, opneAI_response)
+
+    records = 0
+    try:
+        # Only listings with a price per m² count, the price statistics drop the others
+        records = int(per_square_meter_values(extract_listings([opneAI_response])).size)
+    except (json.JSONDecodeError, TypeError) as e:
+        logger.warning(f"⚠️ JSON parsing error: {e}")
 
-    if wise_snippets:
-        rate = wise_snippets[0]
-        conversion_cache[country] = rate
-        logger.info(f"✅ [cost_in_dollar] Fetched and cached rate: {rate}")
-        return rate
+    archive_extraction(link_url, opneAI_response)
 
-    logger.warning(f"⚠️ [cost_in_dollar] No conversion rate found for {country}. Using fallback.")
-    conversion_cache[country] = ["", "0 USD"]
-    return ["", "0 USD"]
+    return opneAI_response, records
 
-async def get_scrap_results(country, city, address, price_in_dollars):
+async def get_scrap_results(country, city, address, usd_rate, checkpoint):
     logger.info("📊 [get_scrap_results] Started...")
 
-    params = {
-        "engine": "google",
-        "q": f"Find houses, flats, apartments, commercial property listings for sale in {country} having City {city}, address {address}",
-        "api_key": SERP_API_KEY,
-    }
-
-    search = GoogleSearch(params)
-    results = search.get_dict()
-    organic_results = results.get("organic_results", [])
-    links = [result["link"] for result in organic_results]
+    links = checkpoint.get("serp")
+    if links is None:
+        params = {
+            "engine": "google",
+            "q": f"Find houses, flats, apartments, commercial property listings for sale in {country} having City {city}, address {address}",
+            "api_key": SERP_API_KEY,
+        }
+
+        with span("serp") as stage:
+            results = await search(params)
+            if "error" in results:
+                stage.fail()
+        organic_results = results.get("organic_results", [])
+        links = [result["link"] for result in organic_results]
+        # Failed searches are retried on resume instead of replaying "no links"
+        if "error" not in results:
+            checkpoint.record("serp", links)
 
     if not links:
         logger.warning("❌ [get_scrap_results] No SERP links found.")
@@ -92,156 +146,249 @@ async def get_scrap_results(country, city, address, price_in_dollars):
         key=lambda link: domain_priority.get(extract_domain(link), float('inf'))
     )
 
-    total_records = 0
-    min_required_records = 8
-    accumulated_opneAI_response = ""
-
-    for i, link_url in enumerate(sorted_links):
-        logger.info(f"🌍 [get_scrap_results] Fetching from: {link_url}")
-
-        try:
-            domain = extract_domain(link_url)
-            scraper = SCRAPER_REGISTRY.get(domain)
-            if scraper:
-                logger.info(f"🔍 Using dynamic scraper for {domain}")
-                properties = scraper.scrape(link_url, price_in_dollars, i)
-                opneAI_response = json.dumps(properties)
-            else:
-                html_data = await fetch_html(link_url)
-                logger.info(f"✅ HTML content fetched from link {i + 1}")
-
-                file_path = LOG_DIR / f"scraped_{i + 1}.html"
-                with open(file_path, "w", encoding="utf-8") as file:
-                    file.write(html_data)
+    accumulated_opneAI_responses = checkpoint.get("scrape")
+    if accumulated_opneAI_responses is None:
+        accumulated_opneAI_responses, total_records = await scrape_links(sorted_links, usd_rate)
+        if total_records:
+            checkpoint.record("scrape", accumulated_opneAI_responses)
 
-                logger.info(f"📂 HTML saved to {file_path}")
-                opneAI_response = await fetch_openAI_results(file_path, price_in_dollars)
+    return await get_average_price_people_type(accumulated_opneAI_responses)
 
+async def scrape_links(sorted_links, usd_rate):
+    total_records = 0
+    min_required_records = 8
+    responses = {}
+
+    # Keep up to SERP_LINK_FANOUT links in flight, refilling in priority order
+    queued_links = iter(enumerate(sorted_links))
+    in_flight = {}
+
+    def start_next_link():
+        next_link = next(queued_links, None)
+        if next_link is None:
+            return False
+        i, link_url = next_link
+        in_flight[asyncio.create_task(scrape_link(i, link_url, usd_rate))] = i
+        return True
+
+    while len(in_flight) < SERP_LINK_FANOUT and start_next_link():
+        pass
+
+    while in_flight:
+        done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            i = in_flight.pop(task)
             try:
-                cleaned_response = clean_openai_json(opneAI_response)
-                data = json.loads(cleaned_response)
-                if isinstance(data, list):
-                    total_records += len(data)
-                elif isinstance(data, dict):
-                    for value in data.values():
-                        if isinstance(value, list):
-                            total_records += len(value)
-                            break
-            except json.JSONDecodeError as e:
-                logger.warning(f"⚠️ JSON parsing error: {e}")
-
-            accumulated_opneAI_response += opneAI_response
-
-            with open(LOG_DIR / f"openai_{i + 1}.txt", "w", encoding="utf-8") as file:
-                file.write(opneAI_response)
-
-            if total_records >= min_required_records:
-                logger.info("✅ Minimum data threshold met. Breaking early.")
-                break
-
-        except Exception as e:
-            logger.error(f"❌ Failed to retrieve data from link {i + 1}: {e}")
-
-    logger.info(f"📊 Total Records Collected: {total_records}")
-    logger.debug(f"accumulated_opneAI_response: {accumulated_opneAI_response[:300]}...")
-    return await get_average_price_people_type(accumulated_opneAI_response)
-
-async def calculate_cost():
-    logger.info("🚀 [calculate_cost] Cost estimation started...")
-    db = Database()
-    records = db.read_user_data()
-
-    for row in records:
-        logger.info("---------------------------------------------------")
-        data = []
-        accountid = row["accountid"]
-        city = ''
-        original_address = ""
-
-        if row.get("country"):
-            country = str(row["country"])
-            original_address += "country=" + country
-
-        if row.get("city"):
-            city = str(row["city"])
-            original_address += ", city=" + city
-
-        if row.get("address"):
-            address = str(row["address"])
-            original_address += ", address=" + address
+                opneAI_response, records = task.result()
+                responses[i] = opneAI_response
+                total_records += records
+            except Exception as e:
+                logger.error(f"❌ Failed to retrieve data from link {i + 1}: {e}")
 
-        logger.info(f"📍 Processing address: {original_address}")
+        if total_records >= min_required_records:
+            logger.info(f"✅ Minimum data threshold met. Cancelling {len(in_flight)} in-flight link(s).")
+            for task in in_flight:
+                task.cancel()
+            await asyncio.gather(*in_flight, return_exceptions=True)
+            break
 
-        cost_in_dollars = await cost_in_dollar(country)
-        scrap_results = await get_scrap_results(country, city, address, cost_in_dollars)
-        logger.debug(f"🧾 scrap_results: {scrap_results}")
+        while len(in_flight) < SERP_LINK_FANOUT and start_next_link():
+            pass
 
-        if scrap_results and len(scrap_results) > 0:
-            try:
-                neighborhood_cost = int(float(scrap_results.get("median", 0)))
-                street_cost = int(float(scrap_results.get("average", 0)))
-            except Exception as e:
-                logger.error(f"❌ Failed to extract cost values: {e}")
-                neighborhood_cost = 0
-                street_cost = 0
-
-            try:
-                response, is_valid_address = await analyse_location_image(original_address)
-                logger.debug(f"🖼️ analyse_location_image: {response}")
+    logger.info(f"📊 Total Records Collected: {total_records}")
+    return [responses[i] for i in sorted(responses)], total_records
+
+async def process_account(writer, row, checkpoint):
+    """Analyse one account and queue its result row; returns True if a row was queued for writing."""
+    logger.info("---------------------------------------------------")
+    data = []
+    accountid = row["accountid"]
+    city = ''
+    original_address = ""
+
+    if row.get("country"):
+        country = str(row["country"])
+        original_address += "country=" + country
+
+    if row.get("city"):
+        city = str(row["city"])
+        original_address += ", city=" + city
+
+    if row.get("address"):
+        address = str(row["address"])
+        original_address += ", address=" + address
+
+    logger.info(f"📍 Processing address: {original_address}")
+
+    usd_rate = await get_usd_rate(country)
+    scrap_results = checkpoint.get("stats")
+    if scrap_results is None:
+        scrap_results = await get_scrap_results(country, city, address, usd_rate, checkpoint)
+        if scrap_results and isinstance(scrap_results, dict):
+            checkpoint.record("stats", scrap_results)
+    logger.debug(f"🧾 scrap_results: {scrap_results}")
+
+    if scrap_results and len(scrap_results) > 0:
+        try:
+            neighborhood_cost = int(float(scrap_results.get("median", 0)))
+            street_cost = int(float(scrap_results.get("average", 0)))
+        except Exception as e:
+            logger.error(f"❌ Failed to extract cost values: {e}")
+            neighborhood_cost = 0
+            street_cost = 0
 
-                if is_valid_address and response["object"] not in ['no image detected', 'no object detected', 'no imagery available']:
-                    analyse_address_response = await analyse_address_using_openai(original_address)
-                    data.append((
-                        accountid, neighborhood_cost, street_cost, 0,
-                        str(response["image_people_type"]),
-                        str(analyse_address_response.get("street_people_type", scrap_results.get("street_people_type", ""))),
-                        str(analyse_address_response.get("neighbourhood_people_type", scrap_results.get("neighbourhood_people_type", ""))),
-                        str(response["object"]),
-                        str(response["area_type"]),
-                        str(response["property_type"]),
-                        1,
-                        address,
-                        str(scrap_results.get("people_type", analyse_address_response.get("people_type", "")))
-                    ))
-                    logger.info("✅ Image + address analysis complete with valid image.")
-                else:
+        try:
+            image_result = checkpoint.get("image")
+            if not image_result or not image_result[1]:
+                with span("image_analysis") as stage:
+                    image_result = await analyse_location_image(original_address)
+                    if not image_result[1]:
+                        stage.fail()
+                # (fallback, False) means geocoding, Street View or OpenAI failed; retry it on resume
+                if image_result[1]:
+                    checkpoint.record("image", image_result)
+            response, is_valid_address = image_result
+            logger.debug(f"🖼️ analyse_location_image: {response}")
+
+            analyse_address_response = checkpoint.get("address")
+            if not isinstance(analyse_address_response, dict):
+                with span("address_analysis") as stage:
                     analyse_address_response = await analyse_address_using_openai(original_address)
-                    data.append((
-                        accountid, neighborhood_cost, street_cost, 0,
-                        "",
-                        str(analyse_address_response.get("street_people_type", scrap_results.get("street_people_type", ""))),
-                        str(analyse_address_response.get("neighbourhood_people_type", scrap_results.get("neighbourhood_people_type", ""))),
-                        "no imagery available",
-                        str(analyse_address_response["area_type"]),
-                        str(analyse_address_response["property_type"]),
-                        1,
-                        address,
-                        str(analyse_address_response.get("people_type", scrap_results.get("people_type", "")))
-                    ))
-                    logger.info("ℹ️ Used address analysis fallback (no image available).")
-
-                logger.warning(f"📊 [calculate_cost] Data: {data}")
-                db.update_cost_data(data)
+                    if not isinstance(analyse_address_response, dict):
+                        stage.fail()
+                # An unparsed (string) or skipped (None) response is not a result
+                if isinstance(analyse_address_response, dict):
+                    checkpoint.record("address", analyse_address_response)
+            if not isinstance(analyse_address_response, dict):
+                # Not written, so the account is picked up again by a later run
+                logger.warning(f"⚠️ No address analysis for account {accountid}, leaving it for a later run.")
+                return False
+
+            if is_valid_address and response["object"] not in ['no image detected', 'no object detected', 'no imagery available']:
+                data.append((
+                    accountid, neighborhood_cost, street_cost, 0,
+                    str(response["image_people_type"]),
+                    str(analyse_address_response.get("street_people_type", scrap_results.get("street_people_type", ""))),
+                    str(analyse_address_response.get("neighbourhood_people_type", scrap_results.get("neighbourhood_people_type", ""))),
+                    str(response["object"]),
+                    str(response["area_type"]),
+                    str(response["property_type"]),
+                    1,
+                    address,
+                    str(scrap_results.get("people_type", analyse_address_response.get("people_type", "")))
+                ))
+                logger.info("✅ Image + address analysis complete with valid image.")
+            else:
+                data.append((
+                    accountid, neighborhood_cost, street_cost, 0,
+                    "",
+                    str(analyse_address_response.get("street_people_type", scrap_results.get("street_people_type", ""))),
+                    str(analyse_address_response.get("neighbourhood_people_type", scrap_results.get("neighbourhood_people_type", ""))),
+                    "no imagery available",
+                    str(analyse_address_response["area_type"]),
+                    str(analyse_address_response["property_type"]),
+                    1,
+                    address,
+                    str(analyse_address_response.get("people_type", scrap_results.get("people_type", "")))
+                ))
+                logger.info("ℹ️ Used address analysis fallback (no image available).")
 
-            except Exception as e:
-                logger.exception(f"❌ Failed during address/image analysis or DB update: {e}")
-        else:
-            data.append((
-                        accountid, 0, 0, 0,
-                        "",
-                        "",
-                        "",
-                        "address not found",
-                        "",
-                        "",
-                        0,
-                        address,
-                        ""
-                    ))
             logger.warning(f"📊 [calculate_cost] Data: {data}")
-            db.update_cost_data(data)
-            logger.warning("❌ No valid scrap_results returned. updating DB with address not found.")
+            await writer.add(data)
+            return True
 
-        await asyncio.sleep(5)
+        except Exception as e:
+            logger.exception(f"❌ Failed during address/image analysis or DB update: {e}")
+        return False
+    else:
+        data.append((
+                    accountid, 0, 0, 0,
+                    "",
+                    "",
+                    "",
+                    "address not found",
+                    "",
+                    "",
+                    0,
+                    address,
+                    ""
+                ))
+        logger.warning(f"📊 [calculate_cost] Data: {data}")
+        await writer.add(data)
+        logger.warning("❌ No valid scrap_results returned. updating DB with address not found.")
+        return True
+
+async def _account_worker(worker_id, writer, journal, queue, claimer=None):
+    while True:
+        row = await queue.get()
+        account_token = current_account.set(row["accountid"])
+        written = False
+        try:
+            with span("account"):
+                written = await process_account(writer, row, journal.for_account(row["accountid"]))
+        except Exception as e:
+            logger.exception(f"❌ [worker {worker_id}] Account {row.get('accountid')} failed: {e}")
+        finally:
+            current_account.reset(account_token)
+            if claimer and not written:
+                # Nothing to write: stop renewing the lease so another attempt can claim the account
+                try:
+                    await claimer.release([row["accountid"]])
+                except Exception as e:
+                    logger.error(f"❌ [worker {worker_id}] Failed to release lease of account {row['accountid']}: {e}")
+            queue.task_done()
+
+        usage = usage_tracker.finish_account(row["accountid"])
+        if usage:
+            logger.info(f"🧮 [worker {worker_id}] Account {row['accountid']} used {usage['tokens']} OpenAI tokens in {usage['calls']} call(s) (~${usage['cost']:.3f}).")
+
+        if ACCOUNT_DELAY_SECONDS > 0:
+            await asyncio.sleep(ACCOUNT_DELAY_SECONDS)
 
-    db.read_cost_data()
+async def calculate_cost():
+    logger.info(f"🚀 [calculate_cost] Cost estimation started with {MAX_WORKERS} worker(s)...")
+    start_metrics_server()
+    db = SqliteDatabase() if DB_BACKEND == "sqlite" else Database()
+    await run_db(db.ensure_unique_accountid)
+
+    journal = CheckpointJournal()
+    claimer = None
+    if WORK_MODE == "lease":
+        claimer = LeaseClaimer(db)
+        await claimer.start()
+
+    async def on_flush(accountids):
+        for accountid in accountids:
+            journal.record(accountid, "write")
+        if claimer:
+            await claimer.complete(accountids)
+
+    async with CostBatchWriter(db, on_flush=on_flush) as writer:
+        queue = asyncio.Queue(maxsize=MAX_WORKERS * 2)
+        workers = [asyncio.create_task(_account_worker(n, writer, journal, queue, claimer)) for n in range(MAX_WORKERS)]
+
+        accounts = claimer.iter_accounts() if claimer else iter_accounts(db)
+        async for row in accounts:
+            await queue.put(row)
+
+        await queue.join()
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    if claimer:
+        await claimer.stop()
+    journal.close()
+    await asyncio.to_thread(page_archive.close)
+    await run_db(db.read_cost_data)
+    db.close()
+
+    logger.info(f"📦 [calculate_cost] SERP cache stats: {cache_stats()}")
+    logger.info(f"📦 [calculate_cost] LLM cache stats: {llm_cache.cache_stats()}")
+    if REPLAY_MODE != "off":
+        logger.info(f"📼 [calculate_cost] Cassette stats ({REPLAY_MODE}): {cassette_stats()}")
+
+    logger.info(f"⏱️ [calculate_cost] Stage timings:\n{stage_metrics.summary_table()}")
+    logger.info(f"🧮 [calculate_cost] OpenAI usage:\n{usage_tracker.summary_table()}")
+    stage_metrics.write_file()
+    stop_metrics_server()
@@ -0,0 +1,65 @@
+import asyncio
+import os
+import socket
+import uuid
+from app.core.concurrency import run_db
+from app.settings.config import LEASE_BATCH_SIZE, LEASE_SECONDS, LEASE_MAX_ATTEMPTS
+from app.settings.logger import logger
+
+
+class LeaseClaimer:
+    """Claims accounts from client_location_cost_lease so several nodes can share one run."""
+
+    def __init__(self, db, batch_size=LEASE_BATCH_SIZE, lease_seconds=LEASE_SECONDS, max_attempts=LEASE_MAX_ATTEMPTS):
+        self.db = db
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        # Claimed accounts that are queued, being processed or waiting for their batched write
+        self.held = set()
+        self._heartbeat = None
+
+    async def start(self):
+        await run_db(self.db.create_lease_table)
+        await run_db(self.db.seed_lease_table)
+        self._heartbeat = asyncio.create_task(self._renew_periodically())
+        logger.info(f"🪪 [LeaseClaimer] Claiming work as {self.owner}")
+
+    async def stop(self):
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            await asyncio.gather(self._heartbeat, return_exceptions=True)
+
+    async def iter_accounts(self):
+        """Yield claimed accounts batch by batch until nothing is left to claim."""
+        while True:
+            rows = await run_db(self.db.claim_accounts, self.owner, self.batch_size, self.lease_seconds, self.max_attempts)
+            if not rows:
+                logger.info("🪪 [LeaseClaimer] No more claimable accounts.")
+                return
+            logger.info(f"🪪 [LeaseClaimer] Claimed {len(rows)} account(s).")
+            self.held.update(row["accountid"] for row in rows)
+            for row in rows:
+                yield row
+
+    async def complete(self, accountids):
+        self.held.difference_update(accountids)
+        completed = await run_db(self.db.complete_leases, self.owner, accountids)
+        logger.info(f"🪪 [LeaseClaimer] Marked {completed} lease(s) completed.")
+
+    async def release(self, accountids):
+        """Drop leases of accounts that finished without a result; they can be claimed again until max_attempts."""
+        self.held.difference_update(accountids)
+        released = await run_db(self.db.release_leases, self.owner, accountids)
+        logger.info(f"🪪 [LeaseClaimer] Released {released} lease(s) without a result.")
+
+    async def _renew_periodically(self):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                # Only accounts still in flight; finished ones were completed or released
+                renewed = await run_db(self.db.renew_leases, self.owner, self.lease_seconds, sorted(self.held))
+                logger.debug(f"🪪 [LeaseClaimer] Renewed {renewed} lease(s).")
+            except Exception as e:
+                logger.error(f"❌ [LeaseClaimer] Lease heartbeat failed: {e}")
@@ -9,4 +9,119 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 CHATGPT_MODEL = os.getenv("CHATGPT_MODEL")
 GOOGLE_MAP_API_KEY = os.getenv("GOOGLE_MAP_API_KEY")
 ASSISTANT_ID = os.getenv("OPENAI_ASSISTANT_ID")
-SCRAPER_API = os.getenv("SCRAPER_API")
\ No newline at end of file
+SCRAPER_API = os.getenv("SCRAPER_API")
+
+# Worker pool: number of accounts processed at once and pause after each account
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", "1"))
+ACCOUNT_DELAY_SECONDS = float(os.getenv("ACCOUNT_DELAY_SECONDS", "5"))
+
+# Processes for CPU-bound work (HTML parsing, image encoding); 0 runs it inline on the event loop
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(os.cpu_count() or 1)))
+
+# Per-service caps on in-flight calls, shared by all workers
+SERP_CONCURRENCY = int(os.getenv("SERP_CONCURRENCY", "4"))
+OPENAI_CONCURRENCY = int(os.getenv("OPENAI_CONCURRENCY", "4"))
+GOOGLE_MAPS_CONCURRENCY = int(os.getenv("GOOGLE_MAPS_CONCURRENCY", "4"))
+DB_CONCURRENCY = int(os.getenv("DB_CONCURRENCY", os.getenv("DB_POOL_MAX_SIZE", "4")))
+
+# Shared async HTTP client
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_PER_HOST_LIMIT = int(os.getenv("HTTP_PER_HOST_LIMIT", "6"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
+HTTP_MAX_BYTES = int(os.getenv("HTTP_MAX_BYTES", "10000000"))
+
+# Number of SERP links scraped at the same time for one account
+SERP_LINK_FANOUT = max(1, int(os.getenv("SERP_LINK_FANOUT", "3")))
+
+# On-disk caches (SQLite files under CACHE_DIR)
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(BASE_DIR, "..", "cache"))
+SERP_CACHE_TTL_SECONDS = int(os.getenv("SERP_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+FX_CACHE_TTL_SECONDS = int(os.getenv("FX_CACHE_TTL_SECONDS", str(24 * 3600)))
+SERP_CACHE_MAX_MB = int(os.getenv("SERP_CACHE_MAX_MB", "200"))
+
+# Currency rates: local table file, reused while younger than FX_RATE_MAX_AGE_HOURS
+FX_RATE_TABLE = os.getenv("FX_RATE_TABLE", os.path.join(CACHE_DIR, "fx_rates.json"))
+FX_RATE_MAX_AGE_HOURS = float(os.getenv("FX_RATE_MAX_AGE_HOURS", "24"))
+# Failed rate lookups are retried FX_FETCH_ATTEMPTS times with backoff; the stale table entry (or no rate)
+# is then used for FX_RETRY_SECONDS before the next lookup
+FX_FETCH_ATTEMPTS = max(1, int(os.getenv("FX_FETCH_ATTEMPTS", "3")))
+FX_RETRY_SECONDS = float(os.getenv("FX_RETRY_SECONDS", "300"))
+
+# Geocode / Street View caches; images are shared by coordinates rounded to STREET_VIEW_CELL_DECIMALS
+GEOCODE_CACHE_TTL_SECONDS = int(os.getenv("GEOCODE_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+STREET_VIEW_CELL_DECIMALS = int(os.getenv("STREET_VIEW_CELL_DECIMALS", "4"))
+MAPS_CACHE_MAX_MB = int(os.getenv("MAPS_CACHE_MAX_MB", "500"))
+
+# OpenAI response cache: "readwrite", "readonly" (replay hits, never store) or "off"
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "readwrite").lower()
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+LLM_CACHE_MAX_MB = int(os.getenv("LLM_CACHE_MAX_MB", "200"))
+
+# Batched writes to client_location_cost: flush every BATCH_MAX_ROWS rows or BATCH_MAX_SECONDS seconds
+BATCH_MAX_ROWS = int(os.getenv("BATCH_MAX_ROWS", "50"))
+BATCH_MAX_SECONDS = float(os.getenv("BATCH_MAX_SECONDS", "30"))
+
+# Account reader: keyset page size and shard (accountid % SHARD_COUNT == SHARD_INDEX)
+READ_PAGE_SIZE = int(os.getenv("READ_PAGE_SIZE", "500"))
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "1"))
+SHARD_INDEX = int(os.getenv("SHARD_INDEX", "0"))
+# A failed page read is tried READ_PAGE_ATTEMPTS times in total, with backoff, before the run gives up
+READ_PAGE_ATTEMPTS = max(1, int(os.getenv("READ_PAGE_ATTEMPTS", "3")))
+
+# Work distribution: "stream" (keyset reader + shards) or "lease" (claim accounts from a shared lease table)
+WORK_MODE = os.getenv("WORK_MODE", "stream").lower()
+LEASE_BATCH_SIZE = int(os.getenv("LEASE_BATCH_SIZE", "10"))
+LEASE_SECONDS = int(os.getenv("LEASE_SECONDS", "900"))
+LEASE_MAX_ATTEMPTS = int(os.getenv("LEASE_MAX_ATTEMPTS", "3"))
+
+# Per-account stage journal used to resume interrupted runs (empty to disable)
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", os.path.join(CACHE_DIR, "checkpoints.jsonl"))
+
+# HTML parser used by the site scrapers: "auto", "selectolax", "lxml" or "bs4"
+SCRAPER_PARSER = os.getenv("SCRAPER_PARSER", "auto").lower()
+
+# Directory of per-domain scraper spec files (*.json)
+SCRAPER_SPEC_DIR = os.getenv("SCRAPER_SPEC_DIR", os.path.join(BASE_DIR, "..", "scrapers", "specs"))
+
+# Result-page pagination: page cap per link (on top of each spec's max_pages), pages fetched at once,
+# and the number of listings with a price and size after which no further pages are fetched
+SCRAPER_MAX_PAGES = max(1, int(os.getenv("SCRAPER_MAX_PAGES", "3")))
+SCRAPER_PAGE_CONCURRENCY = max(1, int(os.getenv("SCRAPER_PAGE_CONCURRENCY", "3")))
+SCRAPER_RECORD_TARGET = int(os.getenv("SCRAPER_RECORD_TARGET", "20"))
+
+# Selector induction: learn a spec for unknown domains from the listings OpenAI extracted
+SELECTOR_LEARNING = os.getenv("SELECTOR_LEARNING", "on").lower() in ("on", "true", "1")
+LEARN_MIN_LISTINGS = int(os.getenv("LEARN_MIN_LISTINGS", "3"))
+LEARN_MIN_RECALL = float(os.getenv("LEARN_MIN_RECALL", "0.6"))
+LEARNED_SPEC_DIR = os.getenv("LEARNED_SPEC_DIR", os.path.join(CACHE_DIR, "learned_specs"))
+
+# Archive of fetched pages and extraction results, stored compressed by content hash
+PAGE_ARCHIVE = os.getenv("PAGE_ARCHIVE", "on").lower() in ("on", "true", "1")
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(CACHE_DIR, "archive"))
+ARCHIVE_CODEC = os.getenv("ARCHIVE_CODEC", "auto").lower()
+
+# Record/replay of outbound SERP, HTTP and OpenAI exchanges: "off", "record" or "replay"
+REPLAY_MODE = os.getenv("REPLAY_MODE", "off").lower()
+CASSETTE_DIR = os.getenv("CASSETTE_DIR", os.path.join(BASE_DIR, "..", "cassettes"))
+# Replayed exchanges wait recorded latency * scale + a fixed delay
+REPLAY_LATENCY_SCALE = float(os.getenv("REPLAY_LATENCY_SCALE", "0"))
+REPLAY_LATENCY_MS = float(os.getenv("REPLAY_LATENCY_MS", "0"))
+
+# Database backend: "mssql", or "sqlite" for the local stand-in used by offline runs
+DB_BACKEND = os.getenv("DB_BACKEND", "mssql").lower()
+SQLITE_DB_PATH = os.getenv("SQLITE_DB_PATH", os.path.join(CASSETTE_DIR, "standin.sqlite3"))
+
+# Per-stage timing metrics: Prometheus text file written at the end of the run (empty to disable)
+# and an optional live /metrics endpoint (0 disables it)
+METRICS_FILE = os.getenv("METRICS_FILE", os.path.join(CACHE_DIR, "metrics.prom"))
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+# OpenAI token budgets per run and per account (0 = unlimited). Once one is used up, calls from the
+# OPENAI_BUDGET_SKIP_SITES call sites are skipped and all others use OPENAI_BUDGET_FALLBACK_MODEL
+OPENAI_RUN_TOKEN_BUDGET = int(os.getenv("OPENAI_RUN_TOKEN_BUDGET", "0"))
+OPENAI_ACCOUNT_TOKEN_BUDGET = int(os.getenv("OPENAI_ACCOUNT_TOKEN_BUDGET", "0"))
+OPENAI_BUDGET_SKIP_SITES = {
+    site.strip() for site in os.getenv("OPENAI_BUDGET_SKIP_SITES", "listing_extraction,image_analysis").split(",") if site.strip()
+}
+OPENAI_BUDGET_FALLBACK_MODEL = os.getenv("OPENAI_BUDGET_FALLBACK_MODEL", "gpt-4o-mini")
@@ -0,0 +1,226 @@
+"""Benchmark the listing parsers over a corpus of saved result pages.
+
+    python -m benchmarks.bench_parsers                       # run and compare with the baseline
+    python -m benchmarks.bench_parsers --save-baseline       # run and store the results as the baseline
+    python -m benchmarks.bench_parsers --parser bs4          # benchmark another HTML parser backend
+    python -m benchmarks.bench_parsers --import-archive 20   # add up to 20 archived pages per parser to the corpus
+
+The corpus lives in benchmarks/fixtures/<parser>/: a directory named after a scraper spec domain
+holds result pages for that spec, generic/ holds pages for the fetch_html + reduce_html path and
+llm/ holds raw model responses for clean_openai_json. Exits with status 1 when a parser is slower,
+uses more memory or extracts a different number of records than the baseline allows.
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from urllib.parse import urlparse
+
+BENCH_DIR = Path(__file__).resolve().parent
+FIXTURE_DIR = BENCH_DIR / "fixtures"
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+
+MIN_PASS_SECONDS = 0.5
+
+GENERIC = "generic"
+LLM = "llm"
+
+
+def _configure(args):
+    # Must happen before any app module reads its configuration
+    if args.parser:
+        os.environ["SCRAPER_PARSER"] = args.parser
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    os.environ["PAGE_ARCHIVE"] = "off"
+
+
+def _read(path):
+    with open(path, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+def load_parsers():
+    """{parser name: (fixture directory, function(text) -> (cards, records))} for every parser with fixtures."""
+    from app.core.html_processing import extract_body
+    from app.core.html_reduction import reduce_html
+    from app.scrapers.parsing import backend
+    from app.scrapers.spec_scraper import parse_listings, load_spec_registry
+    from app.scrapers.utils import clean_openai_json
+    from app.settings.config import LEARNED_SPEC_DIR
+
+    def spec_parser(spec):
+        page_url = f"{spec.get('base_url') or 'https://' + spec['domain']}/"
+
+        def parse(html):
+            card_count, properties, _ = parse_listings(spec, html, page_url)
+            return card_count, len(properties)
+        return parse
+
+    def reduce_page(html):
+        body = extract_body(html)
+        _, stats = reduce_html(body if body is not None else html)
+        return stats["cards"], stats["cards"]
+
+    def clean_response(raw):
+        data = json.loads(clean_openai_json(raw))
+        records = len(data["properties"] if isinstance(data, dict) else data)
+        return records, records
+
+    parsers = {}
+    registry = load_spec_registry()
+    for domain, scraper in load_spec_registry(LEARNED_SPEC_DIR).items():
+        registry.setdefault(domain, scraper)
+    for domain, scraper in registry.items():
+        parsers[f"{domain} ({backend.name})"] = (FIXTURE_DIR / domain, spec_parser(scraper.spec))
+    parsers["fetch_html + reduce_html"] = (FIXTURE_DIR / GENERIC, reduce_page)
+    parsers["clean_openai_json"] = (FIXTURE_DIR / LLM, clean_response)
+    return {name: parser for name, parser in parsers.items() if any(parser[0].glob("*.*"))}
+
+
+def bench(parse, pages, repeat):
+    """Best-of-repeat timing and the peak Python heap of one parser over its pages."""
+    cards = records = 0
+    started = time.perf_counter()
+    for page in pages:
+        page_cards, page_records = parse(page)
+        cards += page_cards
+        records += page_records
+    # Small corpora are parsed several times per pass so one pass lasts MIN_PASS_SECONDS
+    rounds = max(1, int(MIN_PASS_SECONDS / max(time.perf_counter() - started, 1e-6)))
+
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for page in pages:
+                parse(page)
+        best = min(best, (time.perf_counter() - started) / rounds)
+
+    # tracemalloc slows parsing down, so memory is measured in a separate pass
+    peak = 0
+    tracemalloc.start()
+    for page in pages:
+        tracemalloc.reset_peak()
+        parse(page)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    return {
+        "pages": len(pages),
+        "records": records,
+        "pages_per_sec": round(len(pages) / best, 1),
+        "card_us": round(best / max(cards, 1) * 1e6, 1),
+        "peak_kib": round(peak / 1024),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Regression messages for results that fall outside the baseline by more than threshold."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["records"] != base["records"]:
+            regressions.append(f"{name}: {result['records']} records extracted, baseline {base['records']}")
+        if result["pages_per_sec"] < base["pages_per_sec"] * (1 - threshold):
+            regressions.append(f"{name}: {result['pages_per_sec']} pages/s, baseline {base['pages_per_sec']}")
+        if result["peak_kib"] > base["peak_kib"] * (1 + threshold):
+            regressions.append(f"{name}: peak {result['peak_kib']} KiB, baseline {base['peak_kib']}")
+    return regressions
+
+
+def print_table(results, baseline):
+    print(f"\n{'parser':<40} {'pages':>5} {'records':>7} {'pages/s':>9} {'µs/card':>9} {'peak KiB':>9} {'vs base':>8}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        change = f"{result['pages_per_sec'] / base['pages_per_sec'] - 1:+.0%}" if base else "new"
+        print(
+            f"{name:<40} {result['pages']:>5} {result['records']:>7} {result['pages_per_sec']:>9} "
+            f"{result['card_us']:>9} {result['peak_kib']:>9} {change:>8}"
+        )
+
+
+def import_archive(limit):
+    """Copy up to limit archived pages (and model responses) per parser into the fixture corpus."""
+    from app.core.page_archive import page_archive
+    from app.scrapers.spec_scraper import load_spec_registry
+
+    domains = set(load_spec_registry())
+    counts = {}
+    for row in page_archive.find():
+        if row["kind"] == "extraction":
+            target = LLM
+        else:
+            host = urlparse(row["url"]).netloc.lower()
+            host = host[4:] if host.startswith("www.") else host
+            target = host if host in domains else GENERIC
+        if counts.get(target, 0) >= limit:
+            continue
+
+        suffix = ".txt" if target == LLM else ".html"
+        path = FIXTURE_DIR / target / f"{row['sha256'][:16]}{suffix}"
+        if path.exists():
+            continue
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(page_archive.read(row["sha256"], row["codec"]), encoding="utf-8")
+        counts[target] = counts.get(target, 0) + 1
+
+    for target, count in sorted(counts.items()):
+        print(f"Imported {count} fixture(s) into {FIXTURE_DIR / target}")
+    if not counts:
+        print(f"No new pages found in the archive at {page_archive.root}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--parser", help="HTML parser backend for the spec scrapers (SCRAPER_PARSER)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed passes per parser, best one counts (default 5)")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown / memory growth (default 0.2)")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH), help="baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results in the baseline file")
+    parser.add_argument("--import-archive", type=int, metavar="N", help="add up to N archived pages per parser to the corpus")
+    args = parser.parse_args(argv)
+
+    _configure(args)
+    from app.settings.logger import logger
+    # Per-page log lines would dominate the timings
+    logger.setLevel(logging.WARNING)
+
+    if args.import_archive:
+        import_archive(args.import_archive)
+
+    results = {}
+    for name, (fixture_dir, parse) in load_parsers().items():
+        pages = [_read(path) for path in sorted(fixture_dir.glob("*.*"))]
+        results[name] = bench(parse, pages, args.repeat)
+
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8")) if baseline_path.exists() else {}
+    print_table(results, baseline)
+
+    if args.save_baseline:
+        baseline.update(results)
+        baseline_path.write_text(json.dumps(baseline, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"\nBaseline saved to {baseline_path}")
+        return 0
+
+    if not baseline:
+        print(f"\nNo baseline at {baseline_path}; run with --save-baseline to create one.")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
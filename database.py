@@ -1,4 +1,9 @@
 import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
 from dotenv import load_dotenv
 import pymssql
 from app.settings.logger import logger
@@ -11,11 +16,194 @@ database = os.getenv("DB_NAME")
 username = os.getenv("DB_USER")
 password = os.getenv("DB_PASS")
 
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "4"))
+# Idle connections older than this are pinged before reuse
+DB_POOL_PING_SECONDS = float(os.getenv("DB_POOL_PING_SECONDS", "60"))
+DB_CONNECT_RETRIES = int(os.getenv("DB_CONNECT_RETRIES", "5"))
+DB_CONNECT_BACKOFF_SECONDS = float(os.getenv("DB_CONNECT_BACKOFF_SECONDS", "1"))
+# Idempotent calls (page reads, lease claim/renew) are retried this often after a connection error
+DB_READ_RETRIES = int(os.getenv("DB_READ_RETRIES", "1"))
+# How long a node waits for another node's schema setup (sp_getapplock) before skipping it
+DB_SETUP_LOCK_TIMEOUT_SECONDS = float(os.getenv("DB_SETUP_LOCK_TIMEOUT_SECONDS", "120"))
+
+# Column order of the rows passed to update_cost_data / upsert_cost_data_batch
+COST_DATA_COLUMNS = (
+    "accountid", "neighborhood_cost_sqm", "street_cost_sqm", "build_cost_sqm", "image_people_type",
+    "street_people_type", "neighbourhood_people_type", "object", "area_type", "property_type",
+    "is_valid", "client_neighborhood", "people_type",
+)
+COST_DATA_TYPES = (
+    "INT", "INT", "INT", "INT", "NVARCHAR(MAX)",
+    "NVARCHAR(MAX)", "NVARCHAR(MAX)", "NVARCHAR(MAX)", "NVARCHAR(MAX)", "NVARCHAR(MAX)",
+    "INT", "NVARCHAR(MAX)", "NVARCHAR(MAX)",
+)
+# SQL Server errors raised when another node created the same object or row first
+DUPLICATE_OBJECT_ERRORS = (2714, 1913, 2627, 2601)
+# SQL Server allows 2100 parameters per statement
+STAGING_ROWS_PER_INSERT = 2000 // len(COST_DATA_COLUMNS)
+
+class ConnectionPool:
+    """Thread-safe pool of pymssql connections with liveness checks and reconnect backoff."""
+
+    def __init__(self, min_size=DB_POOL_MIN_SIZE, max_size=DB_POOL_MAX_SIZE):
+        self.max_size = max_size
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+        for _ in range(min(min_size, max_size)):
+            self._idle.put((self._connect(), time.monotonic()))
+
+    def _connect(self):
+        delay = DB_CONNECT_BACKOFF_SECONDS
+        for attempt in range(1, DB_CONNECT_RETRIES + 1):
+            try:
+                return pymssql.connect(server, username, password, database, as_dict=True)
+            except (pymssql.OperationalError, pymssql.InterfaceError) as e:
+                if attempt == DB_CONNECT_RETRIES:
+                    raise
+                logger.warning(f"⚠️ [ConnectionPool] Connect attempt {attempt} failed, retrying in {delay:.1f}s: {e}")
+                time.sleep(delay)
+                delay *= 2
+
+    @staticmethod
+    def _is_alive(conn):
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 AS alive")
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _discard(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _checkout(self):
+        try:
+            conn, last_used = self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+        if time.monotonic() - last_used > DB_POOL_PING_SECONDS and not self._is_alive(conn):
+            logger.warning("🔌 [ConnectionPool] Stale connection dropped, reconnecting.")
+            self._discard(conn)
+            return self._connect()
+        return conn
+
+    @contextmanager
+    def connection(self):
+        self._slots.acquire()
+        conn = None
+        try:
+            conn = self._checkout()
+            yield conn
+        except (pymssql.OperationalError, pymssql.InterfaceError):
+            # The connection may be broken; never hand it out again
+            if conn is not None:
+                self._discard(conn)
+                conn = None
+            raise
+        finally:
+            if conn is not None:
+                self._idle.put((conn, time.monotonic()))
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+
+def pooled(method):
+    """Run a Database method with a pooled connection bound to self.conn for the calling thread."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if getattr(self._local, "conn", None) is not None:
+            return method(self, *args, **kwargs)
+        with self.pool.connection() as conn:
+            self._local.conn = conn
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self._local.conn = None
+    return wrapper
+
+
+def retried(method):
+    """Retry an idempotent pooled method on a fresh connection after a connection error, with backoff."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        delay = DB_CONNECT_BACKOFF_SECONDS
+        for attempt in range(DB_READ_RETRIES + 1):
+            try:
+                return method(self, *args, **kwargs)
+            except (pymssql.OperationalError, pymssql.InterfaceError) as e:
+                # Inside another pooled call the broken connection is still bound; let the outer call decide
+                if attempt == DB_READ_RETRIES or getattr(self._local, "conn", None) is not None:
+                    raise
+                logger.warning(f"⚠️ [{method.__name__}] Connection error, retrying on a fresh connection in {delay:.1f}s: {e}")
+                # Idle connections were likely broken by the same outage
+                self.pool.close()
+                time.sleep(delay)
+                delay *= 2
+    return wrapper
+
+
 class Database:
 
     def __init__(self):
-        self.conn = pymssql.connect(server, username, password, database, as_dict=True)
+        self.pool = ConnectionPool()
+        self._local = threading.local()
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            raise RuntimeError("Database.conn used outside a pooled method")
+        return conn
+
+    def close(self):
+        self.pool.close()
 
+    @contextmanager
+    def _setup_lock(self, resource):
+        """Hold a session-level application lock so only one node at a time runs a setup step; yields False on timeout."""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SET NOCOUNT ON;
+            DECLARE @result INT;
+            EXEC @result = sp_getapplock @Resource = %s, @LockMode = 'Exclusive', @LockOwner = 'Session', @LockTimeout = %s;
+            SELECT @result AS result;
+        """, (resource, int(DB_SETUP_LOCK_TIMEOUT_SECONDS * 1000)))
+        acquired = cursor.fetchone()["result"] >= 0
+        cursor.close()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                cursor = self.conn.cursor()
+                cursor.execute("EXEC sp_releaseapplock @Resource = %s, @LockOwner = 'Session';", (resource,))
+                cursor.close()
+
+    def _rollback(self):
+        try:
+            self.conn.rollback()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _is_duplicate(error):
+        return bool(error.args) and error.args[0] in DUPLICATE_OBJECT_ERRORS
+
+    @pooled
     def create_table(self):
         try:
             create_table_query = """
@@ -33,6 +221,8 @@ class Database:
         except pymssql.DatabaseError as e:
             logger.error(f"❌ Error creating table: {e}")
 
+    @retried
+    @pooled
     def read_user_data(self):
         query = """
             SELECT accountid, country, city, address 
@@ -50,6 +240,180 @@ class Database:
         logger.info(f"📊 Client records fetched: {len(records)}")
         return records
 
+    @retried
+    @pooled
+    def read_user_data_page(self, after_accountid, page_size, shard_count=1, shard_index=0):
+        """Next page of unprocessed accounts with accountid > after_accountid, restricted to one shard."""
+        query = """
+            SELECT TOP (%s) a.accountid, a.country, a.city, a.address
+            FROM report.vtiger_account a
+            WHERE a.country IN ('South Africa') AND a.client_qualification_date > '2023-01-01 00:00:01'
+            AND a.accountid > %s
+            AND a.accountid %% %s = %s
+            AND NOT EXISTS (
+                SELECT 1
+                FROM [dbo].[client_location_cost] c
+                WHERE c.accountid = a.accountid AND c.modified_date IS NOT NULL
+            )
+            ORDER BY a.accountid;
+        """
+        cursor = self.conn.cursor()
+        cursor.execute(query, (page_size, after_accountid, shard_count, shard_index))
+        records = cursor.fetchall()
+        cursor.close()
+        return records
+
+    @pooled
+    def create_lease_table(self):
+        """Create the lease table if missing; nodes starting together take turns, and losing the race is harmless."""
+        try:
+            with self._setup_lock("client_location_cost_lease_setup"):
+                cursor = self.conn.cursor()
+                cursor.execute("""
+                    IF OBJECT_ID('dbo.client_location_cost_lease') IS NULL
+                    CREATE TABLE [dbo].[client_location_cost_lease] (
+                        accountid INT PRIMARY KEY,
+                        lease_owner NVARCHAR(128) NULL,
+                        lease_expires DATETIME2 NULL,
+                        attempts INT NOT NULL DEFAULT 0,
+                        completed_at DATETIME2 NULL
+                    );
+                """)
+                self.conn.commit()
+                cursor.close()
+        except pymssql.DatabaseError as e:
+            self._rollback()
+            if not self._is_duplicate(e):
+                raise
+            logger.info("🗂️ Lease table was created by another node.")
+
+    @pooled
+    def seed_lease_table(self):
+        """Register every qualifying, not yet processed account as claimable work.
+
+        Only one node seeds at a time; a node that times out waiting leaves the seeding to the node
+        holding the lock, and rows another node inserted first are skipped.
+        """
+        try:
+            with self._setup_lock("client_location_cost_lease_setup") as acquired:
+                if not acquired:
+                    logger.info("🗂️ Another node is seeding the lease table, skipping.")
+                    return 0
+                return self._seed_lease_table()
+        except pymssql.DatabaseError as e:
+            self._rollback()
+            if not self._is_duplicate(e):
+                raise
+            logger.info("🗂️ Lease table was seeded by another node.")
+            return 0
+
+    def _seed_lease_table(self):
+        query = """
+            INSERT INTO [dbo].[client_location_cost_lease] (accountid)
+            SELECT a.accountid
+            FROM report.vtiger_account a
+            WHERE a.country IN ('South Africa') AND a.client_qualification_date > '2023-01-01 00:00:01'
+            AND NOT EXISTS (
+                SELECT 1 FROM [dbo].[client_location_cost_lease] l WITH (UPDLOCK, HOLDLOCK)
+                WHERE l.accountid = a.accountid
+            )
+            AND NOT EXISTS (
+                SELECT 1 FROM [dbo].[client_location_cost] c
+                WHERE c.accountid = a.accountid AND c.modified_date IS NOT NULL
+            );
+        """
+        cursor = self.conn.cursor()
+        cursor.execute(query)
+        seeded = cursor.rowcount
+        self.conn.commit()
+        cursor.close()
+        logger.info(f"🗂️ {seeded} account(s) added to the lease table.")
+        return seeded
+
+    @retried
+    @pooled
+    def claim_accounts(self, owner, batch_size, lease_seconds, max_attempts):
+        """Atomically lease the next free (or expired) accounts to owner and return their address rows."""
+        query = """
+            SET NOCOUNT ON;
+            DECLARE @claimed TABLE (accountid INT PRIMARY KEY);
+
+            WITH next_batch AS (
+                SELECT TOP (%s) *
+                FROM [dbo].[client_location_cost_lease] WITH (UPDLOCK, READPAST, ROWLOCK)
+                WHERE completed_at IS NULL AND attempts < %s
+                AND (lease_expires IS NULL OR lease_expires < SYSUTCDATETIME())
+                ORDER BY accountid
+            )
+            UPDATE next_batch
+            SET lease_owner = %s,
+                lease_expires = DATEADD(SECOND, %s, SYSUTCDATETIME()),
+                attempts = attempts + 1
+            OUTPUT inserted.accountid INTO @claimed;
+
+            SELECT a.accountid, a.country, a.city, a.address
+            FROM report.vtiger_account a
+            JOIN @claimed c ON c.accountid = a.accountid
+            ORDER BY a.accountid;
+        """
+        cursor = self.conn.cursor()
+        cursor.execute(query, (batch_size, max_attempts, owner, lease_seconds))
+        records = cursor.fetchall()
+        self.conn.commit()
+        cursor.close()
+        return records
+
+    @retried
+    @pooled
+    def renew_leases(self, owner, lease_seconds, accountids):
+        if not accountids:
+            return 0
+        placeholders = ", ".join(["%s"] * len(accountids))
+        cursor = self.conn.cursor()
+        cursor.execute(f"""
+            UPDATE [dbo].[client_location_cost_lease]
+            SET lease_expires = DATEADD(SECOND, %s, SYSUTCDATETIME())
+            WHERE lease_owner = %s AND completed_at IS NULL AND accountid IN ({placeholders});
+        """, (lease_seconds, owner, *accountids))
+        renewed = cursor.rowcount
+        self.conn.commit()
+        cursor.close()
+        return renewed
+
+    @pooled
+    def release_leases(self, owner, accountids):
+        """Give up owner's leases on accounts that finished without a result, so any node can retry them."""
+        if not accountids:
+            return 0
+        placeholders = ", ".join(["%s"] * len(accountids))
+        cursor = self.conn.cursor()
+        cursor.execute(f"""
+            UPDATE [dbo].[client_location_cost_lease]
+            SET lease_owner = NULL, lease_expires = NULL
+            WHERE lease_owner = %s AND completed_at IS NULL AND accountid IN ({placeholders});
+        """, (owner, *accountids))
+        released = cursor.rowcount
+        self.conn.commit()
+        cursor.close()
+        return released
+
+    @pooled
+    def complete_leases(self, owner, accountids):
+        if not accountids:
+            return 0
+        placeholders = ", ".join(["%s"] * len(accountids))
+        cursor = self.conn.cursor()
+        cursor.execute(f"""
+            UPDATE [dbo].[client_location_cost_lease]
+            SET completed_at = SYSUTCDATETIME(), lease_expires = NULL
+            WHERE lease_owner = %s AND accountid IN ({placeholders});
+        """, (owner, *accountids))
+        completed = cursor.rowcount
+        self.conn.commit()
+        cursor.close()
+        return completed
+
+    @pooled
     def read_property_sites_data(self, country, city, address):
         query = "SELECT STRING_AGG(property_sites.property_url, ' ') AS property_urls FROM dbo.property_sites WHERE country = %s"
         cursor = self.conn.cursor()
@@ -57,12 +421,14 @@ class Database:
         records = cursor.fetchall()
         return records[0]['property_urls']
 
+    @pooled
     def read_client(self, accountid):
         query = "SELECT * FROM report.vtiger_account WHERE accountid = %s"
         cursor = self.conn.cursor()
         cursor.execute(query, accountid)
         return cursor.fetchone()
 
+    @pooled
     def insert_data(self, data):
         cursor = self.conn.cursor()
         cursor.execute("SELECT COUNT(*) AS TOTAL FROM [dbo].[client_location_cost] WHERE accountid = %s", data[0][0])
@@ -103,6 +469,7 @@ class Database:
             logger.info(f"➕ Client {data[0][0]} inserted.")
         cursor.close()
 
+    @pooled
     def insert_cost(self, data):
         cursor = self.conn.cursor()
         cursor.execute("SELECT COUNT(*) AS TOTAL FROM [dbo].[client_location_cost] WHERE accountid = %s", data[0][0])
@@ -132,6 +499,7 @@ class Database:
             logger.info(f"➕ Cost inserted for account {data[0][0]}")
         cursor.close()
 
+    @pooled
     def update_neighborhood_data(self, data):
         cursor = self.conn.cursor()
         query = f"UPDATE [dbo].[client_location_cost] SET client_neighborhood = '{data[0][1]}' WHERE accountid = {data[0][0]}"
@@ -140,6 +508,7 @@ class Database:
         cursor.close()
         logger.info(f"🏘️ Neighborhood updated for account {data[0][0]}")
 
+    @pooled
     def update_cost_data(self, data):
         cursor = self.conn.cursor()
         cursor.execute("SELECT COUNT(*) AS TOTAL FROM [dbo].[client_location_cost] WHERE accountid = %s", data[0][0])
@@ -195,6 +564,50 @@ class Database:
             logger.info(f"➕ Inserted cost data for account {data[0][0]}")
         cursor.close()
 
+    @pooled
+    def upsert_cost_data_batch(self, rows):
+        """Load rows into a temp staging table and MERGE them into client_location_cost in one transaction."""
+        # Last row wins when an account appears twice in the same batch
+        rows = list({row[0]: row for row in rows}.values())
+        columns = ", ".join(COST_DATA_COLUMNS)
+        updates = ", ".join(f"target.{column} = source.{column}" for column in COST_DATA_COLUMNS[1:])
+        source_columns = ", ".join(f"source.{column}" for column in COST_DATA_COLUMNS)
+        staging_definition = ", ".join(
+            f"{column} {column_type}{' PRIMARY KEY' if column == 'accountid' else ''}"
+            for column, column_type in zip(COST_DATA_COLUMNS, COST_DATA_TYPES)
+        )
+
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("IF OBJECT_ID('tempdb..#client_location_cost_staging') IS NOT NULL DROP TABLE #client_location_cost_staging;")
+            cursor.execute(f"CREATE TABLE #client_location_cost_staging ({staging_definition});")
+
+            row_placeholders = "(" + ", ".join(["%s"] * len(COST_DATA_COLUMNS)) + ")"
+            for start in range(0, len(rows), STAGING_ROWS_PER_INSERT):
+                chunk = rows[start:start + STAGING_ROWS_PER_INSERT]
+                query = f"INSERT INTO #client_location_cost_staging ({columns}) VALUES " + ", ".join([row_placeholders] * len(chunk))
+                cursor.execute(query, tuple(value for row in chunk for value in row))
+
+            cursor.execute(f"""
+                MERGE [dbo].[client_location_cost] WITH (HOLDLOCK) AS target
+                USING #client_location_cost_staging AS source
+                ON target.accountid = source.accountid
+                WHEN MATCHED THEN
+                    UPDATE SET {updates}, target.modified_date = GETDATE()
+                WHEN NOT MATCHED THEN
+                    INSERT ({columns}, modified_date) VALUES ({source_columns}, GETDATE());
+            """)
+            cursor.execute("DROP TABLE #client_location_cost_staging;")
+            self.conn.commit()
+        except pymssql.DatabaseError:
+            self.conn.rollback()
+            raise
+        finally:
+            cursor.close()
+        return len(rows)
+
+    @retried
+    @pooled
     def read_cost_data(self):
         query = "SELECT * FROM [dbo].[client_location_cost] WHERE client_neighborhood = '';"
         cursor = self.conn.cursor()
@@ -203,19 +616,62 @@ class Database:
         logger.info(f"📥 Found {len(records)} records with missing neighborhoods.")
         return records
 
+    @pooled
     def remove_duplicate_records(self):
-        query = "SELECT accountid, COUNT(*) AS RecordCount FROM [dbo].[client_location_cost] GROUP BY accountid;"
+        """Keep only the most recently modified row per accountid, in one set-based DELETE."""
+        query = """
+            WITH ranked AS (
+                SELECT ROW_NUMBER() OVER (PARTITION BY accountid ORDER BY modified_date DESC) AS row_rank
+                FROM [dbo].[client_location_cost]
+            )
+            DELETE FROM ranked WHERE row_rank > 1;
+        """
         cursor = self.conn.cursor()
         cursor.execute(query)
-        records = cursor.fetchall()
+        removed = cursor.rowcount
+        self.conn.commit()
+        cursor.close()
+        if removed > 0:
+            logger.warning(f"❌ {removed} duplicate record(s) removed from client_location_cost")
+        return removed
 
-        for record in records:
-            if record['RecordCount'] > 1:
-                cursor.execute("DELETE FROM [dbo].[client_location_cost] WHERE accountid = %s", record['accountid'])
+    @pooled
+    def ensure_unique_accountid(self):
+        """Add a unique index on accountid (after removing duplicates) so MERGE can never insert a second row.
+
+        Nodes starting together take turns under an application lock. Failures such as missing DDL
+        rights are logged and the run continues without the index, as it did before it existed.
+        """
+        try:
+            with self._setup_lock("client_location_cost_unique_index") as acquired:
+                if not acquired:
+                    logger.warning("⚠️ Timed out waiting for another node's index setup, continuing without checking it.")
+                    return
+                cursor = self.conn.cursor()
+                cursor.execute("""
+                    SELECT COUNT(*) AS TOTAL FROM sys.indexes
+                    WHERE name = 'UX_client_location_cost_accountid' AND object_id = OBJECT_ID('dbo.client_location_cost')
+                """)
+                exists = cursor.fetchone()["TOTAL"] > 0
+                cursor.close()
+                if exists:
+                    return
+
+                self.remove_duplicate_records()
+                cursor = self.conn.cursor()
+                cursor.execute("""
+                    CREATE UNIQUE INDEX UX_client_location_cost_accountid
+                    ON [dbo].[client_location_cost] (accountid)
+                    WHERE accountid IS NOT NULL;
+                """)
                 self.conn.commit()
-                logger.warning(f"❌ Duplicate record removed for account {record['accountid']}")
-        cursor.close()
+                cursor.close()
+                logger.info("🔒 Unique index on client_location_cost.accountid created.")
+        except pymssql.DatabaseError as e:
+            self._rollback()
+            logger.warning(f"⚠️ Could not ensure the unique index on client_location_cost.accountid, continuing without it: {e}")
 
+    @pooled
     def get_fields(self, table_name):
         query = f"SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_NAME = {table_name}"
         cursor = self.conn.cursor()
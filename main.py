@@ -1,5 +1,7 @@
 import asyncio
 from app.services.processor import calculate_cost
+from app.core.http_client import close_http_client
+from app.core.cpu_pool import shutdown_cpu_pool
 from app.settings.logger import logger
 
 if __name__ == "__main__":
@@ -13,6 +15,8 @@ if __name__ == "__main__":
         logger.exception(f"❌ Unhandled exception occurred in main loop: {e}")
     finally:
         logger.info("🔄 Cleaning up async tasks and closing event loop...")
+        loop.run_until_complete(close_http_client())
+        shutdown_cpu_pool()
         loop.run_until_complete(asyncio.sleep(1))
         loop.run_until_complete(loop.shutdown_asyncgens())
         loop.close()
@@ -0,0 +1,111 @@
+"""Offline record/replay runs of the cost pipeline.
+
+    python replay.py seed --csv accounts.csv        # or --from-mssql 50
+    python replay.py record                          # live run, every exchange saved to CASSETTE_DIR
+    python replay.py replay --latency-scale 1        # offline run served from the cassettes
+
+Runs use the SQLite stand-in database and a fresh cache directory, so recorded and replayed
+runs make the same outbound requests and can be compared.
+"""
+import argparse
+import asyncio
+import csv
+import os
+import sys
+import tempfile
+import time
+
+
+def _configure(args):
+    # Must happen before any app module reads its configuration
+    os.environ["DB_BACKEND"] = "sqlite"
+    os.environ["REPLAY_MODE"] = args.command
+    os.environ["ACCOUNT_DELAY_SECONDS"] = str(args.account_delay)
+    os.environ["CACHE_DIR"] = args.cache_dir or tempfile.mkdtemp(prefix="replay-cache-")
+    # The live rate table would change the rates (and SERP lookups) a replay sees
+    os.environ["FX_RATE_TABLE"] = os.path.join(os.environ["CACHE_DIR"], "fx_rates.json")
+    if args.workers:
+        os.environ["MAX_WORKERS"] = str(args.workers)
+    if args.command == "replay":
+        os.environ["REPLAY_LATENCY_SCALE"] = str(args.latency_scale)
+        os.environ["REPLAY_LATENCY_MS"] = str(args.latency_ms)
+
+
+def seed(args):
+    from sqlite_database import SqliteDatabase
+
+    if args.csv:
+        with open(args.csv, newline="", encoding="utf-8") as file:
+            rows = [dict(row, accountid=int(row["accountid"])) for row in csv.DictReader(file)]
+    else:
+        from database import Database
+        db = Database()
+        rows = db.read_user_data_page(-2**31, args.from_mssql)
+        db.close()
+
+    db = SqliteDatabase()
+    seeded = db.seed_accounts(rows)
+    db.close()
+    print(f"Seeded {seeded} accounts into {db.path}")
+
+
+def run(args):
+    from app.services.processor import calculate_cost
+    from app.core.cassette import cassette_stats
+    from app.core.cpu_pool import shutdown_cpu_pool
+    from app.core.http_client import close_http_client
+    from sqlite_database import SqliteDatabase
+
+    db = SqliteDatabase()
+    if not args.keep_results:
+        db.reset_results()
+
+    async def main():
+        try:
+            await calculate_cost()
+        finally:
+            await close_http_client()
+
+    started = time.perf_counter()
+    try:
+        asyncio.run(main())
+    finally:
+        shutdown_cpu_pool()
+    elapsed = time.perf_counter() - started
+
+    accounts = db.count_results()
+    db.close()
+    print(f"\n{args.command}: {accounts} accounts in {elapsed:.1f}s ({accounts / elapsed:.2f} accounts/s)")
+    for service, stats in cassette_stats().items():
+        print(f"  {service:<7} hits={stats['hits']} misses={stats['misses']} entries={stats['entries']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="load accounts into the SQLite stand-in")
+    source = seed_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--csv", help="CSV with accountid,country,city,address columns")
+    source.add_argument("--from-mssql", type=int, metavar="N", help="copy the next N unprocessed accounts from SQL Server")
+
+    for command in ("record", "replay"):
+        run_parser = commands.add_parser(command, help=f"{command} a full pipeline run")
+        run_parser.add_argument("--workers", type=int, help="account workers (MAX_WORKERS)")
+        run_parser.add_argument("--account-delay", type=float, default=0, help="pause per account in seconds (default 0)")
+        run_parser.add_argument("--cache-dir", help="cache directory (default: a fresh temporary one)")
+        run_parser.add_argument("--keep-results", action="store_true", help="do not reset results from earlier runs")
+        if command == "replay":
+            run_parser.add_argument("--latency-scale", type=float, default=0, help="sleep recorded latency times this")
+            run_parser.add_argument("--latency-ms", type=float, default=0, help="extra fixed latency per exchange")
+
+    args = parser.parse_args(argv)
+    if args.command == "seed":
+        seed(args)
+    else:
+        _configure(args)
+        run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
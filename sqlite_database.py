@@ -0,0 +1,173 @@
+import os
+import sqlite3
+import threading
+import time
+from app.settings.config import SQLITE_DB_PATH
+from app.settings.logger import logger
+from database import COST_DATA_COLUMNS
+
+SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS accounts (
+        accountid INTEGER PRIMARY KEY,
+        country TEXT,
+        city TEXT,
+        address TEXT
+    );
+    CREATE TABLE IF NOT EXISTS client_location_cost (
+        id INTEGER PRIMARY KEY,
+        {", ".join(f"{column} {'INTEGER UNIQUE' if column == 'accountid' else ''}" for column in COST_DATA_COLUMNS)},
+        modified_date TEXT
+    );
+    CREATE TABLE IF NOT EXISTS client_location_cost_lease (
+        accountid INTEGER PRIMARY KEY,
+        lease_owner TEXT,
+        lease_expires REAL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        completed_at REAL
+    );
+"""
+
+
+class SqliteDatabase:
+    """Local SQLite stand-in for Database with the methods used by calculate_cost.
+
+    Accounts come from an `accounts` table (seed it with seed_accounts or replay.py seed);
+    results are written to `client_location_cost` as in SQL Server.
+    """
+
+    def __init__(self, path=SQLITE_DB_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        logger.info(f"🗄️ [SqliteDatabase] Using local database {path}")
+
+    def _query(self, query, params=()):
+        with self._lock:
+            return [dict(row) for row in self.conn.execute(query, params).fetchall()]
+
+    def _execute(self, query, params=()):
+        with self._lock, self.conn:
+            return self.conn.execute(query, params).rowcount
+
+    def close(self):
+        self.conn.close()
+
+    def seed_accounts(self, rows):
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO accounts (accountid, country, city, address) VALUES (?, ?, ?, ?)",
+                [(row["accountid"], row.get("country"), row.get("city"), row.get("address")) for row in rows],
+            )
+        return len(rows)
+
+    def reset_results(self):
+        """Forget all results and leases so every account is processed again."""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM client_location_cost")
+            self.conn.execute("DELETE FROM client_location_cost_lease")
+
+    def ensure_unique_accountid(self):
+        # accountid is declared UNIQUE in the schema
+        return None
+
+    def read_user_data_page(self, after_accountid, page_size, shard_count=1, shard_index=0):
+        return self._query("""
+            SELECT a.accountid, a.country, a.city, a.address
+            FROM accounts a
+            WHERE a.accountid > ? AND a.accountid % ? = ?
+            AND NOT EXISTS (
+                SELECT 1 FROM client_location_cost c
+                WHERE c.accountid = a.accountid AND c.modified_date IS NOT NULL
+            )
+            ORDER BY a.accountid
+            LIMIT ?
+        """, (after_accountid, shard_count, shard_index, page_size))
+
+    def create_lease_table(self):
+        # Created with the schema
+        return None
+
+    def seed_lease_table(self):
+        seeded = self._execute("""
+            INSERT OR IGNORE INTO client_location_cost_lease (accountid)
+            SELECT a.accountid FROM accounts a
+            WHERE NOT EXISTS (
+                SELECT 1 FROM client_location_cost c
+                WHERE c.accountid = a.accountid AND c.modified_date IS NOT NULL
+            )
+        """)
+        logger.info(f"🗂️ {seeded} account(s) added to the lease table.")
+        return seeded
+
+    def claim_accounts(self, owner, batch_size, lease_seconds, max_attempts):
+        now = time.time()
+        with self._lock, self.conn:
+            ids = [row[0] for row in self.conn.execute("""
+                SELECT accountid FROM client_location_cost_lease
+                WHERE completed_at IS NULL AND attempts < ?
+                AND (lease_expires IS NULL OR lease_expires < ?)
+                ORDER BY accountid LIMIT ?
+            """, (max_attempts, now, batch_size))]
+            if not ids:
+                return []
+            placeholders = ", ".join("?" * len(ids))
+            self.conn.execute(f"""
+                UPDATE client_location_cost_lease
+                SET lease_owner = ?, lease_expires = ?, attempts = attempts + 1
+                WHERE accountid IN ({placeholders})
+            """, (owner, now + lease_seconds, *ids))
+            rows = self.conn.execute(f"""
+                SELECT accountid, country, city, address FROM accounts
+                WHERE accountid IN ({placeholders}) ORDER BY accountid
+            """, ids).fetchall()
+        return [dict(row) for row in rows]
+
+    def renew_leases(self, owner, lease_seconds, accountids):
+        if not accountids:
+            return 0
+        placeholders = ", ".join("?" * len(accountids))
+        return self._execute(f"""
+            UPDATE client_location_cost_lease SET lease_expires = ?
+            WHERE lease_owner = ? AND completed_at IS NULL AND accountid IN ({placeholders})
+        """, (time.time() + lease_seconds, owner, *accountids))
+
+    def release_leases(self, owner, accountids):
+        if not accountids:
+            return 0
+        placeholders = ", ".join("?" * len(accountids))
+        return self._execute(f"""
+            UPDATE client_location_cost_lease SET lease_owner = NULL, lease_expires = NULL
+            WHERE lease_owner = ? AND completed_at IS NULL AND accountid IN ({placeholders})
+        """, (owner, *accountids))
+
+    def complete_leases(self, owner, accountids):
+        if not accountids:
+            return 0
+        placeholders = ", ".join("?" * len(accountids))
+        return self._execute(f"""
+            UPDATE client_location_cost_lease SET completed_at = ?, lease_expires = NULL
+            WHERE lease_owner = ? AND accountid IN ({placeholders})
+        """, (time.time(), owner, *accountids))
+
+    def upsert_cost_data_batch(self, rows):
+        rows = list({row[0]: row for row in rows}.values())
+        columns = ", ".join(COST_DATA_COLUMNS)
+        updates = ", ".join(f"{column} = excluded.{column}" for column in COST_DATA_COLUMNS[1:])
+        placeholders = ", ".join("?" * len(COST_DATA_COLUMNS))
+        with self._lock, self.conn:
+            self.conn.executemany(f"""
+                INSERT INTO client_location_cost ({columns}, modified_date) VALUES ({placeholders}, datetime('now'))
+                ON CONFLICT (accountid) DO UPDATE SET {updates}, modified_date = excluded.modified_date
+            """, rows)
+        return len(rows)
+
+    def read_cost_data(self):
+        records = self._query("SELECT * FROM client_location_cost WHERE client_neighborhood = ''")
+        logger.info(f"📥 Found {len(records)} records with missing neighborhoods.")
+        return records
+
+    def count_results(self):
+        return self._query("SELECT COUNT(*) AS n FROM client_location_cost")[0]["n"]